@@ -1,11 +1,17 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+from flask_caching import Cache
+from flask_migrate import Migrate
 import logging
 import os
+from collections.abc import Mapping
+from app.serialization import dumps, loads, OrjsonJSONProvider
 
 # Initialize extensions
 db = SQLAlchemy()
+cache = Cache()
+migrate = Migrate()
 
 def configure_logging(app):
     """
@@ -28,15 +34,53 @@ def configure_logging(app):
     app.logger.addHandler(console_handler)
     app.logger.setLevel(logging.INFO)
 
-def create_app(config_class='config.config.Config'):
+def load_config():
+    """
+    Settings for the environment requested through FLASK_ENV: the ones frozen
+    at deployment by tools/freeze_config.py (config/_frozen.py) when they were
+    frozen for that environment, otherwise built from the environment
+    
+    :return: Dictionary of settings
+    """
+    try:
+        from config._frozen import CONFIG as frozen_config
+    except ImportError:
+        frozen_config = None
+    
+    if frozen_config is not None:
+        # Without FLASK_ENV the deployment's own (frozen) choice applies
+        requested_env = os.environ.get('FLASK_ENV', frozen_config['CONFIG_NAME'])
+        if requested_env == frozen_config['CONFIG_NAME']:
+            return frozen_config
+        logging.getLogger(__name__).warning(
+            f"Ignoring config/_frozen.py: frozen for {frozen_config['CONFIG_NAME']}, "
+            f"but FLASK_ENV is {requested_env}"
+        )
+    
+    from config.config import get_config
+    return get_config()
+
+def create_app(config=None):
     """
     Application factory for Food Findr backend
+    
+    :param config: Dictionary of settings (see config.config), or an object
+                   or import path for app.config.from_object; defaults to the
+                   configuration selected by FLASK_ENV (see load_config)
     """
     # Create Flask app
     app = Flask(__name__)
     
     # Load configuration
-    app.config.from_object(config_class)
+    if config is None:
+        config = load_config()
+    if isinstance(config, Mapping):
+        app.config.update(config)
+    else:
+        app.config.from_object(config)
+    
+    # Route Flask's own JSON handling through orjson
+    app.json = OrjsonJSONProvider(app)
     
     # FIXED: Configure CORS with additional allowed headers
     CORS(app, resources={
@@ -54,8 +98,19 @@ def create_app(config_class='config.config.Config'):
         }
     })
     
-    # Initialize database
+    # Encode and decode JSON/JSONB columns with orjson rather than the stdlib
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'json_serializer': lambda obj: dumps(obj).decode(),
+        'json_deserializer': loads,
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
+    
+    # Initialize database and migrations (schema is managed with `flask db upgrade`)
     db.init_app(app)
+    migrate.init_app(app, db)
+    
+    # Initialize response cache
+    cache.init_app(app)
     
     # Configure logging
     configure_logging(app)
@@ -67,12 +122,13 @@ def create_app(config_class='config.config.Config'):
     from .routes import restaurant_routes
     app.register_blueprint(restaurant_routes.bp)
     
-    # Create database tables
-    with app.app_context():
-        try:
-            db.create_all()
-            app.logger.info("Database tables created successfully")
-        except Exception as e:
-            app.logger.error(f"Database table creation failed: {e}")
+    # Optionally create missing tables at startup (development convenience)
+    if app.config.get('CREATE_DB_ON_START'):
+        with app.app_context():
+            try:
+                db.create_all()
+                app.logger.info("Database tables created successfully")
+            except Exception as e:
+                app.logger.error(f"Database table creation failed: {e}")
     
     return app
\ No newline at end of file
@@ -1,7 +1,11 @@
 from app import db
-from sqlalchemy.sql import func
-import json
+from app.serialization import dumps
+from sqlalchemy import event, exists, select, text, update, literal_column, DDL
+from sqlalchemy.sql import func, table, column
+from sqlalchemy.dialects.postgresql import insert, ARRAY, JSONB, TSVECTOR
+from sqlalchemy.orm import deferred
 from datetime import datetime
+from types import SimpleNamespace
 import logging
 
 logger = logging.getLogger(__name__)
@@ -26,14 +30,14 @@ class Restaurant(db.Model):
     longitude = db.Column(db.Float, nullable=True)
     
     # Business Details
-    categories = db.Column(db.String(500), nullable=True)  # Comma-separated categories
+    categories = db.Column(ARRAY(db.String(100)), nullable=True)  # Category names
     
     # Ratings and Pricing
     rating = db.Column(db.Float, default=0.0, nullable=True)
     price = db.Column(db.Integer, nullable=True)
     
-    # Detailed JSON storage for raw API data
-    raw_api_data = db.Column(db.Text, nullable=True)  # Changed to Text to ensure compatibility
+    # Detailed JSON storage for raw API data (deferred: only loaded when accessed)
+    raw_api_data = deferred(db.Column(JSONB, nullable=True))
     
     # Dietary and Feature Flags
     is_vegan = db.Column(db.Boolean, default=False, nullable=True)
@@ -42,12 +46,73 @@ class Restaurant(db.Model):
     is_kosher = db.Column(db.Boolean, default=False, nullable=True)
     is_gluten_free = db.Column(db.Boolean, default=False, nullable=True)
     
+    # Full-text search document over name and description, maintained by
+    # PostgreSQL (deferred: only used in filters)
+    search_vector = deferred(db.Column(
+        TSVECTOR,
+        db.Computed(
+            "to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, ''))",
+            persisted=True
+        )
+    ))
+    
+    # Pre-serialized API summary (without id), refreshed on every write
+    cached_json = db.Column(db.Text, nullable=True)
+    
     # Metadata
     created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
     updated_at = db.Column(db.DateTime(timezone=True), onupdate=func.now(), nullable=True)
     
+    # Indexes for the search filter set
+    __table_args__ = (
+        db.Index('ix_restaurants_geo', 'latitude', 'longitude'),
+        db.Index('ix_restaurants_earth', func.ll_to_earth(latitude, longitude),
+                 postgresql_using='gist'),
+        db.Index('ix_restaurants_rating', rating.desc().nulls_last()),
+        db.Index('ix_restaurants_categories', 'categories', postgresql_using='gin'),
+        db.Index('ix_restaurants_search', 'search_vector', postgresql_using='gin'),
+        # Dietary flags are low cardinality, so index each one partially
+        db.Index('ix_restaurants_vegan_geo', 'latitude', 'longitude',
+                 postgresql_where=is_vegan.is_(True)),
+        db.Index('ix_restaurants_vegetarian_geo', 'latitude', 'longitude',
+                 postgresql_where=is_vegetarian.is_(True)),
+        db.Index('ix_restaurants_halal_geo', 'latitude', 'longitude',
+                 postgresql_where=is_halal.is_(True)),
+        db.Index('ix_restaurants_kosher_geo', 'latitude', 'longitude',
+                 postgresql_where=is_kosher.is_(True)),
+        db.Index('ix_restaurants_gluten_free_geo', 'latitude', 'longitude',
+                 postgresql_where=is_gluten_free.is_(True)),
+        # Matching partial indexes in search order (rating, best first), so
+        # dietary searches can read rows already sorted
+        db.Index('ix_restaurants_vegan_rating', rating.desc().nulls_last(),
+                 postgresql_where=is_vegan.is_(True)),
+        db.Index('ix_restaurants_vegetarian_rating', rating.desc().nulls_last(),
+                 postgresql_where=is_vegetarian.is_(True)),
+        db.Index('ix_restaurants_halal_rating', rating.desc().nulls_last(),
+                 postgresql_where=is_halal.is_(True)),
+        db.Index('ix_restaurants_kosher_rating', rating.desc().nulls_last(),
+                 postgresql_where=is_kosher.is_(True)),
+        db.Index('ix_restaurants_gluten_free_rating', rating.desc().nulls_last(),
+                 postgresql_where=is_gluten_free.is_(True)),
+        # Price ceiling with rating ordering
+        db.Index('ix_restaurants_price_rating', price, rating.desc().nulls_last()),
+    )
+    
+    # Columns exposed in API summaries (see summary_columns/summary)
+    SUMMARY_COLUMNS = (
+        'id', 'foursquare_id', 'name', 'address', 'latitude', 'longitude',
+        'rating', 'price', 'categories',
+        'is_vegan', 'is_vegetarian', 'is_halal', 'is_kosher', 'is_gluten_free',
+        'cached_json'
+    )
+    
     # Relationships
-    reviews = db.relationship('Review', backref='restaurant', lazy='dynamic')
+    reviews = db.relationship(
+        'Review',
+        backref='restaurant',
+        lazy='select',
+        order_by='Review.created_at.desc()'
+    )
     
     def __init__(self, **kwargs):
         """
@@ -78,6 +143,41 @@ class Restaurant(db.Model):
         # Initialize with validated data
         super(Restaurant, self).__init__(**kwargs)
     
+    @classmethod
+    def earth_point(cls):
+        """
+        SQL expression for the restaurant location as an earthdistance point
+        (matches the ix_restaurants_earth expression index)
+        """
+        return func.ll_to_earth(cls.latitude, cls.longitude)
+    
+    @staticmethod
+    def _normalize_foursquare_data(restaurant_data):
+        """
+        Map Foursquare restaurant data onto restaurant columns with defaults applied
+        """
+        normalized_data = {
+            'foursquare_id': restaurant_data.get('foursquare_id'),
+            'name': restaurant_data.get('name'),
+            'address': restaurant_data.get('address'),
+            'latitude': restaurant_data.get('latitude'),
+            'longitude': restaurant_data.get('longitude'),
+            'categories': restaurant_data.get('categories') or [],
+            'rating': restaurant_data.get('rating', 4.0),  # Default rating
+            'price': restaurant_data.get('price', 2),      # Default to mid-range
+            'raw_api_data': restaurant_data.get('raw_api_data'),
+            'is_vegan': restaurant_data.get('is_vegan', False),
+            'is_vegetarian': restaurant_data.get('is_vegetarian', False),
+            'is_halal': restaurant_data.get('is_halal', False),
+            'is_kosher': restaurant_data.get('is_kosher', False),
+            'is_gluten_free': restaurant_data.get('is_gluten_free', False)
+        }
+        # Core INSERT/UPDATE statements bypass the ORM events, so fill the cache here
+        normalized_data['cached_json'] = Restaurant._cached_summary_json(
+            SimpleNamespace(id=None, **normalized_data)
+        )
+        return normalized_data
+    
     @classmethod
     def create_or_update_from_foursquare(cls, restaurant_data):
         """
@@ -92,33 +192,25 @@ class Restaurant(db.Model):
             return None
         
         try:
-            # Try to find existing restaurant
-            existing = cls.query.filter_by(foursquare_id=restaurant_data.get('foursquare_id')).first()
+            # Check for an existing restaurant without loading its columns
+            foursquare_id = restaurant_data.get('foursquare_id')
+            present = db.session.query(
+                exists().where(cls.foursquare_id == foursquare_id)
+            ).scalar()
             
             # Prepare normalized data
-            normalized_data = {
-                'foursquare_id': restaurant_data.get('foursquare_id'),
-                'name': restaurant_data.get('name'),
-                'address': restaurant_data.get('address'),
-                'latitude': restaurant_data.get('latitude'),
-                'longitude': restaurant_data.get('longitude'),
-                'categories': restaurant_data.get('categories', ''),
-                'rating': restaurant_data.get('rating', 4.0),  # Default rating
-                'price': restaurant_data.get('price', 2),      # Default to mid-range
-                'raw_api_data': restaurant_data.get('raw_api_data'),
-                'is_vegan': restaurant_data.get('is_vegan', False),
-                'is_vegetarian': restaurant_data.get('is_vegetarian', False),
-                'is_halal': restaurant_data.get('is_halal', False),
-                'is_kosher': restaurant_data.get('is_kosher', False),
-                'is_gluten_free': restaurant_data.get('is_gluten_free', False)
-            }
+            normalized_data = cls._normalize_foursquare_data(restaurant_data)
             
-            if existing:
-                # Update existing restaurant
-                for key, value in normalized_data.items():
-                    setattr(existing, key, value)
-                existing.updated_at = datetime.utcnow()
-                restaurant = existing
+            if present:
+                # Update existing restaurant with a single UPDATE ... RETURNING,
+                # bypassing per-attribute ORM change tracking
+                restaurant = db.session.scalars(
+                    update(cls)
+                    .where(cls.foursquare_id == foursquare_id)
+                    .values(**normalized_data, updated_at=datetime.utcnow())
+                    .returning(cls),
+                    execution_options={'populate_existing': True}
+                ).one()
                 logger.info(f"Updated existing restaurant: {restaurant.name}")
             else:
                 # Create new restaurant
@@ -132,25 +224,198 @@ class Restaurant(db.Model):
             logger.error(f"Error creating/updating restaurant: {e}")
             return None
     
-    def to_dict(self):
+    @classmethod
+    def bulk_upsert_from_foursquare(cls, restaurants_data):
         """
-        Convert restaurant to dictionary for API response
+        Create or update many restaurants from Foursquare API data in a single
+        INSERT ... ON CONFLICT (foursquare_id) DO UPDATE statement
+        
+        :param restaurants_data: List of restaurant data dictionaries from Foursquare
+        :return: Tuple of (created, updated) row counts
+        """
+        # Normalize valid records; a statement may only touch each foursquare_id once
+        rows = {}
+        for restaurant_data in restaurants_data:
+            if not restaurant_data.get('foursquare_id') or not restaurant_data.get('name'):
+                logger.warning("Skipping restaurant with missing required fields")
+                continue
+            rows[restaurant_data['foursquare_id']] = cls._normalize_foursquare_data(restaurant_data)
+        
+        if not rows:
+            return 0, 0
+        
+        stmt = insert(cls.__table__).values(list(rows.values()))
+        update_columns = {
+            column: stmt.excluded[column]
+            for column in next(iter(rows.values()))
+            if column != 'foursquare_id'
+        }
+        update_columns['updated_at'] = func.now()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['foursquare_id'],
+            set_=update_columns
+        ).returning(
+            # xmax is only zero for freshly inserted row versions
+            literal_column('xmax = 0').label('inserted')
+        )
+        
+        inserted = db.session.execute(stmt).scalars().all()
+        created = sum(inserted)
+        updated = len(inserted) - created
+        logger.info(f"Upserted restaurants: {created} created, {updated} updated")
+        return created, updated
+    
+    @classmethod
+    def insert_from_foursquare(cls, restaurants_data):
+        """
+        Insert new restaurants from Foursquare API data with a single
+        executemany INSERT, skipping any that already exist
+        
+        :param restaurants_data: List of validated restaurant data dictionaries
+        :return: Summary rows (see summary_columns) of the inserted restaurants
+        """
+        if not restaurants_data:
+            return []
+        
+        updated_at = datetime.utcnow()
+        rows = [
+            {**cls._normalize_foursquare_data(restaurant_data), 'updated_at': updated_at}
+            for restaurant_data in restaurants_data
+        ]
+        stmt = insert(cls.__table__).on_conflict_do_nothing(
+            index_elements=['foursquare_id']
+        ).returning(*cls.summary_columns())
+        
+        return db.session.execute(stmt, rows).all()
+    
+    @classmethod
+    def summary_columns(cls):
+        """
+        Columns needed to build an API summary, for values-only queries
+        that skip ORM instance hydration
+        """
+        return [getattr(cls, name) for name in cls.SUMMARY_COLUMNS]
+    
+    @staticmethod
+    def summary(restaurant):
+        """
+        Build the API summary of a restaurant from either a Restaurant
+        instance or a row selected with summary_columns()
         """
         return {
-            'id': self.id,
-            'foursquare_id': self.foursquare_id,
-            'name': self.name,
-            'address': self.address,
-            'latitude': self.latitude,
-            'longitude': self.longitude,
-            'rating': self.rating,
-            'price': self.price,
-            'categories': self.categories.split(', ') if self.categories else [],
+            'id': restaurant.id,
+            'foursquare_id': restaurant.foursquare_id,
+            'name': restaurant.name,
+            'address': restaurant.address,
+            'latitude': restaurant.latitude,
+            'longitude': restaurant.longitude,
+            'rating': restaurant.rating,
+            'price': restaurant.price,
+            'categories': restaurant.categories or [],
             'dietary_options': {
-                'vegan': self.is_vegan,
-                'vegetarian': self.is_vegetarian,
-                'halal': self.is_halal,
-                'kosher': self.is_kosher,
-                'gluten_free': self.is_gluten_free
+                'vegan': restaurant.is_vegan,
+                'vegetarian': restaurant.is_vegetarian,
+                'halal': restaurant.is_halal,
+                'kosher': restaurant.is_kosher,
+                'gluten_free': restaurant.is_gluten_free
             }
-        }
\ No newline at end of file
+        }
+    
+    @staticmethod
+    def _cached_summary_json(restaurant):
+        """
+        Serialize the API summary without its id, which is not assigned until
+        insert; summary_json() splices the id back in on read
+        """
+        summary = Restaurant.summary(restaurant)
+        del summary['id']
+        return dumps(summary).decode()
+    
+    @staticmethod
+    def summary_json(restaurant):
+        """
+        API summary as JSON bytes, served from cached_json when available
+        """
+        if restaurant.cached_json:
+            return b'{"id":%d,%s' % (restaurant.id, restaurant.cached_json[1:].encode())
+        return dumps(Restaurant.summary(restaurant))
+    
+    @staticmethod
+    def dietary_trend_counts():
+        """
+        Restaurant counts per dietary option, read from the precomputed
+        dietary_trends_mv materialized view
+        """
+        return db.session.execute(select(dietary_trends)).one()
+    
+    @staticmethod
+    def refresh_dietary_trends():
+        """
+        Recompute the dietary_trends_mv materialized view without blocking readers
+        """
+        db.session.execute(text(f'REFRESH MATERIALIZED VIEW CONCURRENTLY {DIETARY_TRENDS_VIEW}'))
+    
+    def to_dict(self):
+        """
+        Convert restaurant to dictionary for API response
+        """
+        return self.summary(self)
+
+@event.listens_for(Restaurant, 'before_insert')
+@event.listens_for(Restaurant, 'before_update')
+def _refresh_cached_json(mapper, connection, target):
+    """
+    Keep the pre-serialized summary in sync with ORM writes
+    """
+    target.cached_json = Restaurant._cached_summary_json(target)
+
+
+# The earthdistance extension (and cube, which it depends on) must exist
+# before the restaurants table and its GiST index are created
+event.listen(
+    Restaurant.__table__, 'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS cube')
+)
+event.listen(
+    Restaurant.__table__, 'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS earthdistance')
+)
+
+
+# Dietary option counts across all restaurants, precomputed so the trends
+# endpoint does not scan the whole table; refreshed after each data sync
+DIETARY_TRENDS_VIEW = 'dietary_trends_mv'
+# Response cache key of the trends endpoint, cleared whenever the view is refreshed
+DIETARY_TRENDS_CACHE_KEY = 'dietary_trends'
+dietary_trends = table(
+    DIETARY_TRENDS_VIEW,
+    column('total'),
+    column('vegan'),
+    column('vegetarian'),
+    column('halal'),
+    column('kosher'),
+    column('gluten_free')
+)
+event.listen(
+    Restaurant.__table__, 'after_create',
+    DDL(f'''
+        CREATE MATERIALIZED VIEW {DIETARY_TRENDS_VIEW} AS
+        SELECT 1 AS id,
+               count(*) AS total,
+               count(*) FILTER (WHERE is_vegan) AS vegan,
+               count(*) FILTER (WHERE is_vegetarian) AS vegetarian,
+               count(*) FILTER (WHERE is_halal) AS halal,
+               count(*) FILTER (WHERE is_kosher) AS kosher,
+               count(*) FILTER (WHERE is_gluten_free) AS gluten_free
+        FROM restaurants
+    ''')
+)
+# REFRESH ... CONCURRENTLY requires a unique index on the view
+event.listen(
+    Restaurant.__table__, 'after_create',
+    DDL(f'CREATE UNIQUE INDEX ix_{DIETARY_TRENDS_VIEW}_id ON {DIETARY_TRENDS_VIEW} (id)')
+)
+event.listen(
+    Restaurant.__table__, 'before_drop',
+    DDL(f'DROP MATERIALIZED VIEW IF EXISTS {DIETARY_TRENDS_VIEW}')
+)
@@ -1,7 +1,10 @@
 from app import db
+from app.models.restaurant import Restaurant
+from sqlalchemy import select, and_
+from sqlalchemy.orm import aliased
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import JSONB
-import json
+from app.serialization import dumps, loads
 from datetime import datetime
 
 class Review(db.Model):
@@ -21,9 +24,18 @@ class Review(db.Model):
     _sentiment = db.Column('sentiment', db.String(20))
     _dietary_keywords = db.Column('dietary_keywords', db.String(500))
     
+    # Stored VADER compound score of the text, computed once per text change
+    sentiment_polarity = db.Column(db.Float, nullable=True)
+    sentiment_analyzed_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    
     # Timestamps
     created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
     
+    # Supports fetching the newest reviews of a restaurant
+    __table_args__ = (
+        db.Index('ix_reviews_restaurant_created', restaurant_id, created_at.desc()),
+    )
+    
     @property
     def sentiment(self):
         """
@@ -45,8 +57,8 @@ class Review(db.Model):
         """
         if self._dietary_keywords:
             try:
-                return json.loads(self._dietary_keywords)
-            except json.JSONDecodeError:
+                return loads(self._dietary_keywords)
+            except ValueError:
                 return {}
         return {}
     
@@ -56,9 +68,9 @@ class Review(db.Model):
         Setter for dietary keywords
         """
         try:
-            self._dietary_keywords = json.dumps(value)
+            self._dietary_keywords = dumps(value).decode()
         except TypeError:
-            self._dietary_keywords = json.dumps({})
+            self._dietary_keywords = '{}'
     
     @classmethod
     def create_from_foursquare(cls, restaurant_id, review_data):
@@ -71,4 +83,29 @@ class Review(db.Model):
             rating=review_data.get('rating')
         )
         db.session.add(review)
-        return review
\ No newline at end of file
+        return review
+
+# Number of reviews exposed through Restaurant.recent_reviews
+RECENT_REVIEWS_LIMIT = 10
+
+# Reviews ranked newest-first within each restaurant
+_ranked_reviews = select(
+    Review,
+    func.row_number().over(
+        partition_by=Review.restaurant_id,
+        order_by=Review.created_at.desc()
+    ).label('review_rank')
+).subquery()
+_RankedReview = aliased(Review, _ranked_reviews)
+
+# Row-limited relationship: eager-loading it fetches only the newest
+# RECENT_REVIEWS_LIMIT reviews per restaurant
+Restaurant.recent_reviews = db.relationship(
+    _RankedReview,
+    primaryjoin=and_(
+        Restaurant.id == _RankedReview.restaurant_id,
+        _ranked_reviews.c.review_rank <= RECENT_REVIEWS_LIMIT
+    ),
+    order_by=_RankedReview.created_at.desc(),
+    viewonly=True
+)
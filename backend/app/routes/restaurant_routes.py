@@ -1,9 +1,13 @@
-from flask import Blueprint, request, jsonify
-from app.models import Restaurant, Review
-from app.services.nlp_service import generate_restaurant_insights
+from flask import Blueprint, request
+from sqlalchemy.orm import selectinload
+from app.models import Restaurant
+from app.models.restaurant import DIETARY_TRENDS_CACHE_KEY
+from app.services.nlp_service import SentimentAnalyzerUnavailable, cached_restaurant_insights
 from app.services.restaurant_search_service import RestaurantSearchService
-from app import db
+from app import db, cache
+from app.serialization import dumps, json_response, json_stream_response
 import logging
+import numpy as np
 
 # Create a blueprint for restaurant-related routes
 bp = Blueprint('restaurants', __name__, url_prefix='/api/restaurants')
@@ -11,6 +15,35 @@ bp = Blueprint('restaurants', __name__, url_prefix='/api/restaurants')
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Filter options are static, so they are encoded once at import time
+_FILTER_OPTIONS_JSON = dumps({
+    'dietary_restrictions': [
+        'vegan', 
+        'vegetarian', 
+        'halal', 
+        'kosher', 
+        'gluten_free'
+    ],
+    'price_ranges': [1, 2, 3, 4],
+    'rating_options': [
+        {'min_rating': 3.0, 'label': '3+ Stars'},
+        {'min_rating': 4.0, 'label': '4+ Stars'},
+        {'min_rating': 4.5, 'label': '4.5+ Stars'}
+    ],
+    'distance_options': [
+        {'max_distance': 1, 'label': 'Within 1 km'},
+        {'max_distance': 3, 'label': 'Within 3 km'},
+        {'max_distance': 5, 'label': 'Within 5 km'},
+        {'max_distance': 10, 'label': 'Within 10 km'}
+    ]
+})
+
+def _is_successful(response):
+    """
+    Response filter so that only successful responses are cached
+    """
+    return response[1] == 200
+
 @bp.route('/search', methods=['GET'])
 def search_restaurants():
     """
@@ -30,12 +63,19 @@ def search_restaurants():
         max_price = request.args.get('max_price', type=int)
         query = request.args.get('query')
         max_distance = request.args.get('max_distance', type=float)
+        category = request.args.get('category')
+        limit = request.args.get('limit', default=50, type=int)  # Best rated N restaurants
         
         # Input validation
         if latitude is None or longitude is None:
-            return jsonify({
+            return json_response({
                 'error': 'Location coordinates (latitude and longitude) are required'
             }), 400
+        
+        if limit < 1:
+            return json_response({
+                'error': 'limit must be a positive integer'
+            }), 400
             
         # Perform search with error handling
         try:
@@ -46,27 +86,43 @@ def search_restaurants():
                 min_rating=min_rating,
                 max_price=max_price,
                 query=query,
-                max_distance=max_distance
+                max_distance=max_distance,
+                category=category,
+                max_results=limit
             )
             
-            # Convert to JSON-serializable format
-            restaurant_list = [restaurant.to_dict() for restaurant in restaurants]
+            # Stream the body from each restaurant's pre-serialized summary as
+            # rows arrive; the total is only known once the stream is drained
+            def generate():
+                yield b'{"restaurants":['
+                total = 0
+                try:
+                    for restaurant in restaurants:
+                        chunk = Restaurant.summary_json(restaurant)
+                        yield chunk if total == 0 else b',' + chunk
+                        total += 1
+                except Exception as e:
+                    # The 200 status is already sent, so a failure while the
+                    # cursor is drained closes the body with an error marker
+                    # instead of leaving truncated JSON
+                    logger.error(f"Error streaming search results: {e}")
+                    db.session.rollback()
+                    yield b'],"total_results":%d,"error":"Search results truncated"}' % total
+                    return
+                yield b'],"total_results":%d}' % total
             
-            return jsonify({
-                'total_results': len(restaurant_list),
-                'restaurants': restaurant_list
-            }), 200
+            return json_stream_response(generate()), 200
             
         except Exception as e:
             logger.error(f"Error in search execution: {e}")
-            return jsonify({
+            return json_response({
                 'error': 'Search execution failed',
                 'details': str(e)
             }), 500
     
     except Exception as e:
         logger.error(f"Restaurant search error: {e}")
-        return jsonify({
+        return json_response({
             'error': 'Search failed',
             'details': str(e)
         }), 500
@@ -77,10 +133,12 @@ def get_restaurant_details(restaurant_id):
     Get detailed information for a specific restaurant
     """
     try:
-        restaurant = Restaurant.query.get_or_404(restaurant_id)
-        
-        # Fetch recent reviews
-        reviews = Review.query.filter_by(restaurant_id=restaurant_id).order_by(Review.created_at.desc()).limit(10).all()
+        # Load the restaurant, then only its 10 most recent reviews in one
+        # windowed query
+        restaurant = Restaurant.query.options(
+            selectinload(Restaurant.recent_reviews)
+        ).get_or_404(restaurant_id)
+        reviews = restaurant.recent_reviews
         
         # Prepare restaurant details
         restaurant_details = restaurant.to_dict()
@@ -96,27 +154,28 @@ def get_restaurant_details(restaurant_id):
             } for review in reviews
         ]
         
-        return jsonify(restaurant_details), 200
+        return json_response(restaurant_details), 200
     
     except Exception as e:
         logger.error(f"Restaurant details retrieval error: {e}")
-        return jsonify({
+        return json_response({
             'error': 'Failed to retrieve restaurant details',
             'details': str(e)
         }), 500
 
 @bp.route('/dietary-trends', methods=['GET'])
+@cache.cached(timeout=300, key_prefix=DIETARY_TRENDS_CACHE_KEY, response_filter=_is_successful)
 def get_dietary_trends():
     """
     Retrieve dietary trends across all restaurants
     """
     try:
-        # Calculate dietary trends
-        all_restaurants = Restaurant.query.all()
-        total_count = len(all_restaurants)
+        # Read precomputed counts for each dietary option
+        counts = Restaurant.dietary_trend_counts()
+        total_count = counts.total
         
         if total_count == 0:
-            return jsonify({
+            return json_response({
                 'dietary_trends': {
                     'vegan': 0,
                     'vegetarian': 0,
@@ -126,29 +185,22 @@ def get_dietary_trends():
                 }
             }), 200
         
-        # Count restaurants with each dietary option
-        vegan_count = sum(1 for r in all_restaurants if r.is_vegan)
-        vegetarian_count = sum(1 for r in all_restaurants if r.is_vegetarian)
-        halal_count = sum(1 for r in all_restaurants if r.is_halal)
-        kosher_count = sum(1 for r in all_restaurants if r.is_kosher)
-        gluten_free_count = sum(1 for r in all_restaurants if r.is_gluten_free)
-        
         # Calculate percentages
         trends = {
-            'vegan': round(vegan_count / total_count * 100, 2),
-            'vegetarian': round(vegetarian_count / total_count * 100, 2),
-            'halal': round(halal_count / total_count * 100, 2),
-            'kosher': round(kosher_count / total_count * 100, 2),
-            'gluten_free': round(gluten_free_count / total_count * 100, 2)
+            'vegan': round(counts.vegan / total_count * 100, 2),
+            'vegetarian': round(counts.vegetarian / total_count * 100, 2),
+            'halal': round(counts.halal / total_count * 100, 2),
+            'kosher': round(counts.kosher / total_count * 100, 2),
+            'gluten_free': round(counts.gluten_free / total_count * 100, 2)
         }
         
-        return jsonify({
+        return json_response({
             'dietary_trends': trends
         }), 200
     
     except Exception as e:
         logger.error(f"Dietary trends retrieval error: {e}")
-        return jsonify({
+        return json_response({
             'error': 'Failed to retrieve dietary trends',
             'details': str(e)
         }), 500
@@ -167,46 +219,62 @@ def find_nearby_restaurants():
         max_distance = request.args.get('max_distance', default=5, type=float)  # Default 5km
         dietary_restrictions = request.args.getlist('dietary_restrictions')
         min_rating = request.args.get('min_rating', type=float)
+        limit = request.args.get('limit', type=int)  # Closest N restaurants
         
         # Input validation
         if latitude is None or longitude is None:
-            return jsonify({
+            return json_response({
                 'error': 'Location coordinates (latitude and longitude) are required'
             }), 400
         
+        if limit is not None and limit < 1:
+            return json_response({
+                'error': 'limit must be a positive integer'
+            }), 400
+        
         # Perform search
-        nearby_restaurants = RestaurantSearchService.search_restaurants(
+        nearby_restaurants = list(RestaurantSearchService.search_restaurants(
             latitude=latitude,
             longitude=longitude,
             max_distance=max_distance,
             dietary_restrictions=dietary_restrictions,
-            min_rating=min_rating
+            min_rating=min_rating,
+            max_results=None  # Ranked by distance below, not by rating
+        ))
+        
+        # Compute all distances in one vectorized pass; missing coordinates
+        # become NaN and those restaurants are dropped from the ordering
+        coordinates = np.array(
+            [(r.latitude, r.longitude) for r in nearby_restaurants], dtype=np.float64
+        ).reshape(-1, 2)
+        distances = RestaurantSearchService.haversine_distances(
+            latitude, longitude, coordinates[:, 0], coordinates[:, 1]
         )
+        located = np.flatnonzero(~np.isnan(distances))
         
-        # Convert to JSON-serializable format with distance
-        restaurant_list = []
-        for restaurant in nearby_restaurants:
-            if restaurant.latitude is not None and restaurant.longitude is not None:
-                distance = RestaurantSearchService.haversine_distance(
-                    latitude, longitude, 
-                    restaurant.latitude, restaurant.longitude
-                )
-                
-                restaurant_data = restaurant.to_dict()
-                restaurant_data['distance_km'] = round(distance, 2)
-                restaurant_list.append(restaurant_data)
+        # Keep the closest restaurants, sorted by distance
+        if limit is not None and limit < len(located):
+            order = located[np.argpartition(distances[located], limit - 1)[:limit]]
+        else:
+            order = located
+        order = order[np.argsort(distances[order], kind='stable')]
+        closest = [(float(distances[i]), nearby_restaurants[i]) for i in order]
         
-        # Sort by distance
-        restaurant_list.sort(key=lambda x: x.get('distance_km', float('inf')))
+        # Convert to JSON-serializable format only for the surviving restaurants
+        restaurant_list = []
+        for distance, restaurant in closest:
+            restaurant_data = Restaurant.summary(restaurant)
+            restaurant_data['distance_km'] = round(distance, 2)
+            restaurant_list.append(restaurant_data)
         
-        return jsonify({
+        return json_response({
             'total_results': len(restaurant_list),
             'nearby_restaurants': restaurant_list
         }), 200
     
     except Exception as e:
         logger.error(f"Nearby restaurants search error: {e}")
-        return jsonify({
+        return json_response({
             'error': 'Failed to find nearby restaurants',
             'details': str(e)
         }), 500
@@ -220,25 +288,30 @@ def get_restaurant_insights(restaurant_id):
         # Check if restaurant exists
         restaurant = Restaurant.query.get_or_404(restaurant_id)
         
-        # Generate insights
+        # Generate insights, reusing the previous result while reviews are unchanged
         try:
-            insights = generate_restaurant_insights(restaurant_id)
+            insights = cached_restaurant_insights(restaurant_id)
             
-            return jsonify({
+            return json_response({
                 'restaurant_id': restaurant_id,
                 'restaurant_name': restaurant.name,
                 'insights': insights
             }), 200
+        except SentimentAnalyzerUnavailable as e:
+            return json_response({
+                'error': 'Sentiment analysis is unavailable',
+                'details': str(e)
+            }), 503
         except Exception as e:
             logger.error(f"Error generating insights: {e}")
-            return jsonify({
+            return json_response({
                 'error': 'Failed to generate insights',
                 'details': str(e)
             }), 500
     
     except Exception as e:
         logger.error(f"Restaurant insights generation error: {e}")
-        return jsonify({
+        return json_response({
             'error': 'Failed to generate restaurant insights',
             'details': str(e)
         }), 500
@@ -248,35 +321,6 @@ def get_filter_options():
     """
     Retrieve available filter options for restaurant search
     """
-    try:
-        # Prepare filter options
-        filter_options = {
-            'dietary_restrictions': [
-                'vegan', 
-                'vegetarian', 
-                'halal', 
-                'kosher', 
-                'gluten_free'
-            ],
-            'price_ranges': [1, 2, 3, 4],
-            'rating_options': [
-                {'min_rating': 3.0, 'label': '3+ Stars'},
-                {'min_rating': 4.0, 'label': '4+ Stars'},
-                {'min_rating': 4.5, 'label': '4.5+ Stars'}
-            ],
-            'distance_options': [
-                {'max_distance': 1, 'label': 'Within 1 km'},
-                {'max_distance': 3, 'label': 'Within 3 km'},
-                {'max_distance': 5, 'label': 'Within 5 km'},
-                {'max_distance': 10, 'label': 'Within 10 km'}
-            ]
-        }
-        
-        return jsonify(filter_options), 200
-    
-    except Exception as e:
-        logger.error(f"Filter options retrieval error: {e}")
-        return jsonify({
-            'error': 'Failed to retrieve filter options',
-            'details': str(e)
-        }), 500
\ No newline at end of file
+    response = json_response(_FILTER_OPTIONS_JSON)
+    response.headers['Cache-Control'] = 'public, max-age=86400, immutable'
+    return response, 200
@@ -0,0 +1,61 @@
+from flask import current_app, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+import json
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder if orjson is unavailable
+    orjson = None
+
+
+def dumps(obj, default=None) -> bytes:
+    """
+    Serialize an object to JSON bytes
+    
+    :param default: Callable converting otherwise unsupported objects
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=default)
+    return json.dumps(obj, separators=(',', ':'), default=default or str).encode('utf-8')
+
+
+def loads(data):
+    """
+    Deserialize JSON from a string or bytes
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class OrjsonJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider delegating to orjson, so jsonify, request.get_json
+    and friends share the fast encoder
+    """
+    
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, default=self.default).decode()
+    
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+
+def json_response(payload, default=None):
+    """
+    Build a JSON response directly from orjson output, bypassing jsonify
+    
+    :param payload: Object to serialize, or an already-encoded JSON body
+    """
+    body = payload if isinstance(payload, bytes) else dumps(payload, default)
+    return current_app.response_class(body, mimetype='application/json')
+
+
+def json_stream_response(chunks):
+    """
+    Build a streaming JSON response from an iterable of encoded JSON chunks
+    """
+    return current_app.response_class(
+        stream_with_context(chunks),
+        mimetype='application/json'
+    )
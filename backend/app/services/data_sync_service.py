@@ -1,8 +1,11 @@
+import aiohttp
+import asyncio
 import logging
 from datetime import datetime, timedelta
-from app import db
+from app import db, cache
 from app.models import Restaurant
-from app.services.foursquare_service import FoursquareService
+from app.models.restaurant import DIETARY_TRENDS_CACHE_KEY
+from app.services.foursquare_service import FoursquareService, REQUEST_TIMEOUT
 
 class DataSyncService:
     """
@@ -37,36 +40,43 @@ class DataSyncService:
                 limit=max_results
             )
             
+            return cls.store_restaurants(restaurants_data)
+        
+        except Exception as e:
+            logger.error(f"Restaurant sync error: {e}")
+            return None
+    
+    @classmethod
+    def store_restaurants(cls, restaurants_data, refresh_trends=True):
+        """
+        Create or update fetched restaurants in the database
+        
+        :param restaurants_data: List of parsed restaurant dictionaries
+        :param refresh_trends: Refresh the precomputed dietary trends if rows changed
+        :return: Synchronization results
+        """
+        logger = logging.getLogger(__name__)
+        
+        try:
+            # Create or update every restaurant in a single
+            # INSERT ... ON CONFLICT (foursquare_id) DO UPDATE statement
+            created, updated = Restaurant.bulk_upsert_from_foursquare(restaurants_data)
+            
             # Track synchronization results
             sync_results = {
                 'total_fetched': len(restaurants_data),
-                'created': 0,
-                'updated': 0,
-                'skipped': 0
+                'created': created,
+                'updated': updated,
+                'skipped': len(restaurants_data) - created - updated
             }
             
-            # Process each restaurant
-            for restaurant_data in restaurants_data:
-                # Check if restaurant already exists
-                existing_restaurant = Restaurant.query.filter_by(
-                    foursquare_id=restaurant_data.get('foursquare_id')
-                ).first()
-                
-                if existing_restaurant:
-                    # Update existing restaurant
-                    for key, value in restaurant_data.items():
-                        if hasattr(existing_restaurant, key):
-                            setattr(existing_restaurant, key, value)
-                    existing_restaurant.updated_at = datetime.utcnow()
-                    sync_results['updated'] += 1
-                else:
-                    # Create new restaurant
-                    new_restaurant = Restaurant(**restaurant_data)
-                    db.session.add(new_restaurant)
-                    sync_results['created'] += 1
-            
-            # Commit changes
+            # Commit changes, refreshing the precomputed dietary trends with them
+            refreshed = refresh_trends and (created or updated)
+            if refreshed:
+                Restaurant.refresh_dietary_trends()
             db.session.commit()
+            if refreshed:
+                cache.delete(DIETARY_TRENDS_CACHE_KEY)
             
             logger.info(f"Restaurant sync results: {sync_results}")
             return sync_results
@@ -99,6 +109,62 @@ class PeriodicSyncManager:
             {'name': 'Chicago', 'latitude': 41.8781, 'longitude': -87.6298},
         ]
     
+    @classmethod
+    async def _fetch_location(cls, session, location, radius, max_results):
+        """
+        Fetch Foursquare results for one location
+        
+        :return: Tuple of (location, API response)
+        """
+        api_response = await FoursquareService.search_restaurants_async(
+            session,
+            location['latitude'],
+            location['longitude'],
+            radius=radius,
+            limit=max_results
+        )
+        return location, api_response
+    
+    @classmethod
+    async def _sync_locations(cls, locations, sync_log, radius=5000, max_results=50):
+        """
+        Fetch all locations concurrently, storing each one as soon as its
+        response arrives so database writes overlap the remaining requests
+        
+        :param locations: Locations to search around
+        :param sync_log: Sync log to record per-location results in
+        :param radius: Search radius in meters
+        :param max_results: Maximum number of restaurants per location
+        :return: Whether any restaurant was created or updated
+        """
+        changed = False
+        connector = aiohttp.TCPConnector(limit=20)
+        # Same connect/read bounds as synchronous Foursquare requests, instead
+        # of aiohttp's 5 minute default
+        connect_timeout, read_timeout = REQUEST_TIMEOUT
+        timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            fetches = [
+                cls._fetch_location(session, location, radius, max_results)
+                for location in locations
+            ]
+            for fetch in asyncio.as_completed(fetches):
+                location, api_response = await fetch
+                restaurants_data = FoursquareService.parse_restaurant_data(api_response)
+                sync_result = DataSyncService.store_restaurants(
+                    restaurants_data, refresh_trends=False
+                )
+                
+                if sync_result:
+                    changed = changed or bool(sync_result['created'] or sync_result['updated'])
+                    sync_log['locations_synced'] += 1
+                    sync_log['total_restaurants_processed'] += sync_result['total_fetched']
+                    sync_log['details'].append({
+                        'location_name': location['name'],
+                        **sync_result
+                    })
+        return changed
+    
     @classmethod
     def perform_periodic_sync(cls):
         """
@@ -116,19 +182,18 @@ class PeriodicSyncManager:
         # Get locations to sync
         locations = cls.get_locations_to_sync()
         
-        for location in locations:
-            sync_result = DataSyncService.sync_restaurants_for_location(
-                location['latitude'], 
-                location['longitude']
-            )
-            
-            if sync_result:
-                sync_log['locations_synced'] += 1
-                sync_log['total_restaurants_processed'] += sync_result['total_fetched']
-                sync_log['details'].append({
-                    'location_name': location['name'],
-                    **sync_result
-                })
+        # Fetch every location in parallel and store results as they arrive
+        changed = asyncio.run(cls._sync_locations(locations, sync_log))
+        
+        # Refresh the precomputed dietary trends once for the whole sync
+        if changed:
+            try:
+                Restaurant.refresh_dietary_trends()
+                db.session.commit()
+                cache.delete(DIETARY_TRENDS_CACHE_KEY)
+            except Exception as e:
+                logger.error(f"Dietary trends refresh error: {e}")
+                db.session.rollback()
         
         logger.info(f"Periodic sync completed: {sync_log}")
         return sync_log
@@ -1,20 +1,56 @@
+import aiohttp
+import asyncio
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from flask import current_app
-from typing import Dict, List, Optional, Any
-import json
+from app import cache
+from app.serialization import loads
+from typing import Dict, List, Optional, Any, Tuple
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# Seconds a Foursquare search response is reused for
+SEARCH_CACHE_TIMEOUT = 3600
+
+# (connect, read) timeouts in seconds for Foursquare requests
+REQUEST_TIMEOUT = (3.05, 10)
+
+# Shared session so back-to-back searches reuse pooled keep-alive connections
+# instead of paying a new TCP and TLS handshake per call
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.3)
+))
+
+# Keywords in a restaurant's name or categories that indicate a dietary option
+DIETARY_KEYWORDS = {
+    'is_vegan': ('vegan', 'plant-based'),
+    'is_vegetarian': ('vegetarian', 'veggie'),
+    'is_gluten_free': ('gluten-free', 'gluten free'),
+    'is_halal': ('halal',),
+    'is_kosher': ('kosher',),
+}
+
+# One alternation over every keyword, with a named group per dietary flag,
+# so a single scan of the text reports all matching flags
+_DIETARY_PATTERN = re.compile('|'.join(
+    f"(?P<{flag}>{'|'.join(re.escape(keyword) for keyword in keywords)})"
+    for flag, keywords in DIETARY_KEYWORDS.items()
+))
+
 class FoursquareService:
     BASE_URL = 'https://api.foursquare.com/v3/places'
     
     @classmethod
-    def search_restaurants(
+    def _prepare_search(
         cls, 
         latitude: float, 
         longitude: float, 
-        # Optional parameters with defaults
         query: Optional[str] = None,
         radius: int = 1000,
         categories: Optional[str] = '13000',  # Restaurant category
@@ -23,21 +59,12 @@ class FoursquareService:
         max_price: Optional[int] = None,
         open_now: bool = False,
         sort: str = 'relevance'
-    ) -> Dict[str, Any]:
+    ) -> Tuple[Dict[str, str], Dict[str, Any], str]:
         """
-        Search for restaurants near a specific location with advanced filtering
+        Validate search arguments and build the request headers, query
+        parameters and cache key shared by the sync and async searches
         
-        :param latitude: Latitude of the search center
-        :param longitude: Longitude of the search center
-        :param query: Optional search query to filter restaurants
-        :param radius: Search radius in meters (max 100000)
-        :param categories: Foursquare category IDs
-        :param limit: Maximum number of results (1-50)
-        :param min_price: Minimum price range (1-4)
-        :param max_price: Maximum price range (1-4)
-        :param open_now: Only return currently open restaurants
-        :param sort: Result sorting method
-        :return: JSON response from Foursquare API
+        :return: Tuple of (headers, params, cache_key)
         """
         # Validate inputs
         if not (0 <= radius <= 100000):
@@ -82,16 +109,114 @@ class FoursquareService:
         if open_now:
             params['open_now'] = open_now
         
+        # Cache key for identical searches; coordinates are rounded to
+        # 4 decimal places (~10m) so nearby calls share a key
+        cache_key = (
+            f"fsq:{round(latitude, 4)}:{round(longitude, 4)}:{radius}:{categories}:"
+            f"{query}:{min_price}:{max_price}:{open_now}:{sort}:{limit}"
+        )
+        return headers, params, cache_key
+    
+    @classmethod
+    def search_restaurants(
+        cls, 
+        latitude: float, 
+        longitude: float, 
+        # Optional parameters with defaults
+        query: Optional[str] = None,
+        radius: int = 1000,
+        categories: Optional[str] = '13000',  # Restaurant category
+        limit: int = 50,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+        open_now: bool = False,
+        sort: str = 'relevance'
+    ) -> Dict[str, Any]:
+        """
+        Search for restaurants near a specific location with advanced filtering
+        
+        :param latitude: Latitude of the search center
+        :param longitude: Longitude of the search center
+        :param query: Optional search query to filter restaurants
+        :param radius: Search radius in meters (max 100000)
+        :param categories: Foursquare category IDs
+        :param limit: Maximum number of results (1-50)
+        :param min_price: Minimum price range (1-4)
+        :param max_price: Maximum price range (1-4)
+        :param open_now: Only return currently open restaurants
+        :param sort: Result sorting method
+        :return: JSON response from Foursquare API
+        """
+        headers, params, cache_key = cls._prepare_search(
+            latitude, longitude, query=query, radius=radius, categories=categories,
+            limit=limit, min_price=min_price, max_price=max_price,
+            open_now=open_now, sort=sort
+        )
+        
+        cached_body = cache.get(cache_key)
+        if cached_body is not None:
+            logger.info(f"Using cached Foursquare response")
+            return loads(cached_body)
+        
         try:
-            response = requests.get(
+            response = _SESSION.get(
                 f'{cls.BASE_URL}/search', 
                 headers=headers, 
-                params=params
+                params=params,
+                timeout=REQUEST_TIMEOUT
             )
             response.raise_for_status()
             logger.info(f"Successfully retrieved data from Foursquare API")
-            return response.json()
-        except requests.RequestException as e:
+            
+            # Cache the raw body; error responses are never cached
+            api_response = loads(response.content)
+            cache.set(cache_key, response.content, timeout=SEARCH_CACHE_TIMEOUT)
+            return api_response
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f'Foursquare API Error: {e}')
+            return {"results": []}  # Return empty results on error
+    
+    @classmethod
+    async def search_restaurants_async(
+        cls, 
+        session: aiohttp.ClientSession, 
+        latitude: float, 
+        longitude: float, 
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Asynchronous variant of search_restaurants, so several searches can
+        share one connection pool and run concurrently
+        
+        :param session: aiohttp session used for the request
+        :param latitude: Latitude of the search center
+        :param longitude: Longitude of the search center
+        :param kwargs: Additional search parameters (see search_restaurants)
+        :return: JSON response from Foursquare API
+        """
+        headers, params, cache_key = cls._prepare_search(latitude, longitude, **kwargs)
+        
+        cached_body = cache.get(cache_key)
+        if cached_body is not None:
+            logger.info(f"Using cached Foursquare response")
+            return loads(cached_body)
+        
+        try:
+            # aiohttp only accepts string, int and float query values
+            async with session.get(
+                f'{cls.BASE_URL}/search', 
+                headers=headers, 
+                params={key: str(value) for key, value in params.items()}
+            ) as response:
+                response.raise_for_status()
+                body = await response.read()
+            logger.info(f"Successfully retrieved data from Foursquare API")
+            
+            # Cache the raw body; error responses are never cached
+            api_response = loads(body)
+            cache.set(cache_key, body, timeout=SEARCH_CACHE_TIMEOUT)
+            return api_response
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
             logger.error(f'Foursquare API Error: {e}')
             return {"results": []}  # Return empty results on error
     
@@ -108,78 +233,70 @@ class FoursquareService:
             return []
         
         parsed_restaurants = []
+        append = parsed_restaurants.append
+        find_dietary = _DIETARY_PATTERN.finditer
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
         
         for restaurant in api_response.get('results', []):
+            get = restaurant.get
+            
             # Skip if missing required information
-            fsq_id = restaurant.get('fsq_id')
-            name = restaurant.get('name')
+            fsq_id = get('fsq_id')
+            name = get('name')
             
             if not fsq_id or not name:
-                logger.warning(f"Skipping restaurant with missing ID or name: {restaurant}")
+                logger.warning("Skipping restaurant with missing ID or name: %s", restaurant)
                 continue
             
-            # Extract location data safely
-            location = restaurant.get('location', {})
-            address = location.get('formatted_address', '')
-            
             # Extract coordinates safely
-            geocodes = restaurant.get('geocodes', {})
-            main_geocode = geocodes.get('main', {}) if geocodes else {}
+            main_geocode = (get('geocodes') or {}).get('main') or {}
             latitude = main_geocode.get('latitude')
             longitude = main_geocode.get('longitude')
             
             # Skip if missing coordinates
             if latitude is None or longitude is None:
-                logger.warning(f"Skipping restaurant with missing coordinates: {name}")
+                logger.warning("Skipping restaurant with missing coordinates: %s", name)
                 continue
-                
-            # Extract categories safely
-            category_list = []
-            for category in restaurant.get('categories', []):
-                if category and category.get('name'):
-                    category_list.append(category.get('name'))
             
-            categories_str = ', '.join(category_list)
+            # Extract location data and category names safely
+            address = (get('location') or {}).get('formatted_address', '')
+            category_list = [
+                category_name for category in get('categories') or ()
+                if category and (category_name := category.get('name'))
+            ]
             
             # Detect dietary options from name and categories
-            combined_text = f"{name.lower()} {categories_str.lower()}"
-            
-            is_vegan = 'vegan' in combined_text or 'plant-based' in combined_text
-            is_vegetarian = 'vegetarian' in combined_text or 'veggie' in combined_text
-            is_gluten_free = 'gluten-free' in combined_text or 'gluten free' in combined_text
-            is_halal = 'halal' in combined_text
-            is_kosher = 'kosher' in combined_text
-            
-            # Default rating and price if not available
-            rating = 4.0  # Default rating
-            price = 2  # Default to mid-range
+            dietary_flags = {
+                match.lastgroup
+                for match in find_dietary(' '.join((name, *category_list)).lower())
+            }
             
-            # Create restaurant data
-            parsed_restaurant = {
+            # Create restaurant data, with default rating and price
+            append({
                 'foursquare_id': fsq_id,
                 'name': name,
                 'address': address,
                 'latitude': latitude,
                 'longitude': longitude,
-                'rating': rating,
-                'price': price,
-                'categories': categories_str,
-                'is_vegan': is_vegan,
-                'is_vegetarian': is_vegetarian,
-                'is_gluten_free': is_gluten_free,
-                'is_halal': is_halal,
-                'is_kosher': is_kosher,
-                'raw_api_data': json.dumps({
+                'rating': 4.0,  # Default rating
+                'price': 2,     # Default to mid-range
+                'categories': category_list,
+                'is_vegan': 'is_vegan' in dietary_flags,
+                'is_vegetarian': 'is_vegetarian' in dietary_flags,
+                'is_gluten_free': 'is_gluten_free' in dietary_flags,
+                'is_halal': 'is_halal' in dietary_flags,
+                'is_kosher': 'is_kosher' in dietary_flags,
+                'raw_api_data': {
                     'name': name,
                     'address': address,
                     'categories': category_list
-                })
-            }
+                }
+            })
             
-            logger.info(f"Parsed restaurant: {parsed_restaurant['name']} (ID: {parsed_restaurant['foursquare_id']})")
-            parsed_restaurants.append(parsed_restaurant)
+            if debug_enabled:
+                logger.debug("Parsed restaurant: %s (ID: %s)", name, fsq_id)
         
-        logger.info(f"Successfully parsed {len(parsed_restaurants)} restaurants from Foursquare data")
+        logger.info("Successfully parsed %d restaurants from Foursquare data", len(parsed_restaurants))
         return parsed_restaurants
     
     @classmethod
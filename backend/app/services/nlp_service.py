@@ -1,10 +1,96 @@
 import logging
-from typing import Dict, Any
-from textblob import TextBlob
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Any, Optional
+import nltk
+import numpy as np
+from flask import current_app
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import load_only
 
 from app import db
 from app.models import Restaurant, Review
 
+# Keywords in review text that indicate a dietary option
+_DIETARY_KEYWORDS = {
+    'vegan': ('vegan', 'plant-based', 'dairy-free'),
+    'vegetarian': ('vegetarian', 'no meat', 'meatless'),
+    'halal': ('halal', 'halal-certified'),
+    'kosher': ('kosher', 'kosher-certified'),
+    'gluten-free': ('gluten-free', 'no gluten')
+}
+
+# Regex group names cannot contain '-', so each diet gets a positional group name
+_DIETARY_GROUPS = {f'diet{index}': diet for index, diet in enumerate(_DIETARY_KEYWORDS)}
+
+# One alternation over every keyword, so a single scan of a review finds all
+# mentioned diets
+_DIETARY_PATTERN = re.compile('|'.join(
+    f"(?P<{group}>{'|'.join(re.escape(keyword) for keyword in _DIETARY_KEYWORDS[diet])})"
+    for group, diet in _DIETARY_GROUPS.items()
+))
+
+# Words of three or more letters (apostrophes allowed), matched on lowercased text
+_WORD_PATTERN = re.compile(r"[a-z']{3,}")
+
+class SentimentAnalyzerUnavailable(RuntimeError):
+    """
+    Raised when the VADER lexicon is not installed
+    """
+
+@lru_cache(maxsize=None)
+def _sentiment_analyzer():
+    """
+    Shared VADER analyzer, built on first use so its lexicon is loaded once
+    per process (looked up in NLTK_DATA_PATH as well as the NLTK defaults)
+    
+    :return: The analyzer, or None when the lexicon is missing; the miss is
+             cached too, so it is detected and logged once per process
+    """
+    nltk_data_path = current_app.config.get('NLTK_DATA_PATH')
+    if nltk_data_path and nltk_data_path not in nltk.data.path:
+        nltk.data.path.append(nltk_data_path)
+    try:
+        return SentimentIntensityAnalyzer()
+    except LookupError:
+        logging.error(
+            "VADER lexicon not found, reviews are left unscored until it is "
+            "installed (run the download-nlp-data command) and the app restarted; "
+            "backfill-sentiment then scores them"
+        )
+        return None
+
+def _store_polarity(review, analyzer=None):
+    """
+    Score a review with VADER and store the result on it; the original text
+    is scored, since case carries emphasis. Without the VADER lexicon the
+    polarity is left NULL
+    """
+    analyzer = analyzer or _sentiment_analyzer()
+    if analyzer is None:
+        return
+    review.sentiment_polarity = analyzer.polarity_scores(review.text or '')['compound']
+    review.sentiment_analyzed_at = datetime.utcnow()
+
+@event.listens_for(Review, 'before_insert')
+def _score_new_review(mapper, connection, target):
+    """
+    Store the polarity of every new review
+    """
+    _store_polarity(target)
+
+@event.listens_for(Review, 'before_update')
+def _rescore_edited_review(mapper, connection, target):
+    """
+    Recompute the stored polarity only when the review text changed
+    """
+    if inspect(target).attrs.text.history.has_changes():
+        _store_polarity(target)
+
 class RestaurantInsightsGenerator:
     """
     Service to generate insights for restaurants
@@ -17,22 +103,43 @@ class RestaurantInsightsGenerator:
         
         :param restaurant_id: ID of the restaurant
         :return: Dictionary of restaurant insights
+        :raises SentimentAnalyzerUnavailable: If the VADER lexicon is missing
         """
+        analyzer = _sentiment_analyzer()
+        if analyzer is None:
+            raise SentimentAnalyzerUnavailable("VADER lexicon is not installed")
+        
         try:
             # Fetch the restaurant
             restaurant = Restaurant.query.get(restaurant_id)
             if not restaurant:
                 return {"error": "Restaurant not found"}
             
-            # Fetch reviews for the restaurant
-            reviews = Review.query.filter_by(restaurant_id=restaurant_id).all()
+            # Stream review texts in one pass, feeding every analysis at once
+            reviews = Review.query.filter_by(restaurant_id=restaurant_id).options(
+                load_only(Review.text, Review.sentiment_polarity)
+            ).yield_per(1000)
+            
+            sentiments = []
+            dietary_mentions = dict.fromkeys(_DIETARY_KEYWORDS, 0)
+            word_counts = Counter()
+            
+            for review in reviews:
+                # Reviews scored before polarity was stored get it backfilled
+                if review.sentiment_polarity is None:
+                    _store_polarity(review, analyzer)
+                sentiments.append(review.sentiment_polarity)
+                review_text = (review.text or '').lower()
+                for diet in cls._detect_dietary_keywords(review_text):
+                    dietary_mentions[diet] += 1
+                word_counts.update(cls._tokenize(review_text))
             
             # Analyze reviews
             insights = {
-                'total_reviews': len(reviews),
-                'sentiment_analysis': cls._analyze_sentiment(reviews),
-                'dietary_mentions': cls._detect_dietary_keywords(reviews),
-                'key_phrases': cls._extract_key_phrases(reviews)
+                'total_reviews': len(sentiments),
+                'sentiment_analysis': cls._analyze_sentiment(np.array(sentiments, dtype=np.float64)),
+                'dietary_mentions': dietary_mentions,
+                'key_phrases': cls._extract_key_phrases(word_counts)
             }
             
             # Update restaurant with insights
@@ -46,16 +153,13 @@ class RestaurantInsightsGenerator:
             return {"error": str(e)}
     
     @staticmethod
-    def _analyze_sentiment(reviews):
+    def _analyze_sentiment(sentiments):
         """
-        Analyze sentiment across restaurant reviews
-        """
-        sentiments = []
-        for review in reviews:
-            blob = TextBlob(review.text)
-            sentiments.append(blob.sentiment.polarity)
+        Summarize sentiment across restaurant reviews
         
-        if not sentiments:
+        :param sentiments: Array of per-review compound scores in [-1, 1]
+        """
+        if not sentiments.size:
             return {
                 'average_sentiment': 0,
                 'sentiment_distribution': {
@@ -65,58 +169,46 @@ class RestaurantInsightsGenerator:
                 }
             }
         
-        # Calculate sentiment distribution
+        # Calculate sentiment distribution; neutral is whatever lies in [-0.05, 0.05]
+        positive = int(np.count_nonzero(sentiments > 0.05))
+        negative = int(np.count_nonzero(sentiments < -0.05))
         sentiment_distribution = {
-            'positive': sum(1 for s in sentiments if s > 0.05),
-            'neutral': sum(1 for s in sentiments if abs(s) <= 0.05),
-            'negative': sum(1 for s in sentiments if s < -0.05)
+            'positive': positive,
+            'neutral': sentiments.size - positive - negative,
+            'negative': negative
         }
         
         return {
-            'average_sentiment': sum(sentiments) / len(sentiments),
+            'average_sentiment': float(sentiments.mean()),
             'sentiment_distribution': sentiment_distribution
         }
     
     @staticmethod
-    def _detect_dietary_keywords(reviews):
+    def _detect_dietary_keywords(review_text):
         """
-        Detect dietary-related keywords in reviews
+        Detect the diets mentioned in a lowercased review
+        
+        :return: Set of diet names
         """
-        dietary_keywords = {
-            'vegan': ['vegan', 'plant-based', 'dairy-free'],
-            'vegetarian': ['vegetarian', 'no meat', 'meatless'],
-            'halal': ['halal', 'halal-certified'],
-            'kosher': ['kosher', 'kosher-certified'],
-            'gluten-free': ['gluten-free', 'no gluten']
+        return {
+            _DIETARY_GROUPS[match.lastgroup]
+            for match in _DIETARY_PATTERN.finditer(review_text)
         }
-        
-        mentions = {diet: 0 for diet in dietary_keywords.keys()}
-        
-        for review in reviews:
-            review_text = review.text.lower()
-            for diet, keywords in dietary_keywords.items():
-                if any(keyword in review_text for keyword in keywords):
-                    mentions[diet] += 1
-        
-        return mentions
     
     @staticmethod
-    def _extract_key_phrases(reviews):
+    def _tokenize(review_text):
         """
-        Extract key phrases from reviews
+        Words of a lowercased review considered for key phrases
+        """
+        return _WORD_PATTERN.findall(review_text)
+    
+    @staticmethod
+    def _extract_key_phrases(word_counts):
+        """
+        Extract key phrases from accumulated review word counts
         """
-        from collections import Counter
-        
-        # Collect all words from reviews
-        all_words = []
-        for review in reviews:
-            # Use TextBlob for tokenization and stop word removal
-            blob = TextBlob(review.text)
-            words = [word.lower() for word in blob.words if len(word) > 2]
-            all_words.extend(words)
-        
         # Get most common words
-        return [word for word, count in Counter(all_words).most_common(5)]
+        return [word for word, count in word_counts.most_common(5)]
 
 # Expose the function at the module level
 def generate_restaurant_insights(restaurant_id: int) -> Dict[str, Any]:
@@ -125,11 +217,83 @@ def generate_restaurant_insights(restaurant_id: int) -> Dict[str, Any]:
     """
     return RestaurantInsightsGenerator.generate_restaurant_insights(restaurant_id)
 
+class _UncachedInsights(Exception):
+    """
+    Carries an error result out of the memoized call so it is not cached
+    """
+    
+    def __init__(self, insights):
+        super().__init__(insights.get('error'))
+        self.insights = insights
+
+@lru_cache(maxsize=4096)
+def _memoized_insights(restaurant_id: int, review_count: int, latest_review_id: Optional[int]) -> Dict[str, Any]:
+    insights = generate_restaurant_insights(restaurant_id)
+    if 'error' in insights:
+        raise _UncachedInsights(insights)
+    return insights
+
+def cached_restaurant_insights(restaurant_id: int) -> Dict[str, Any]:
+    """
+    Restaurant insights memoized per review signature (review count and
+    newest review id), so they are only regenerated once reviews are added
+    or removed
+    
+    :param restaurant_id: ID of the restaurant
+    :return: Dictionary of restaurant insights
+    """
+    review_count, latest_review_id = db.session.query(
+        func.count(Review.id), func.max(Review.id)
+    ).filter(Review.restaurant_id == restaurant_id).one()
+    
+    try:
+        return _memoized_insights(restaurant_id, review_count, latest_review_id)
+    except _UncachedInsights as e:
+        return e.insights
+
+def backfill_review_polarity(batch_size: int = 1000) -> int:
+    """
+    Score every review stored without a sentiment polarity (older reviews,
+    or ones inserted while the VADER lexicon was missing), committing per batch
+    
+    :param batch_size: Number of reviews scored per commit
+    :return: Number of reviews scored
+    :raises SentimentAnalyzerUnavailable: If the VADER lexicon is missing
+    """
+    analyzer = _sentiment_analyzer()
+    if analyzer is None:
+        raise SentimentAnalyzerUnavailable("VADER lexicon is not installed")
+    
+    scored = 0
+    while True:
+        # Scored reviews drop out of the filter, so each batch starts afresh
+        reviews = Review.query.filter(Review.sentiment_polarity.is_(None)).options(
+            load_only(Review.text)
+        ).order_by(Review.id).limit(batch_size).all()
+        if not reviews:
+            return scored
+        
+        for review in reviews:
+            _store_polarity(review, analyzer)
+        db.session.commit()
+        scored += len(reviews)
+
 # Periodic insights generation task
-def update_restaurant_insights():
+def update_restaurant_insights(max_workers: int = 8):
     """
     Periodically update insights for all restaurants
+    
+    :param max_workers: Number of restaurants processed concurrently
     """
-    restaurants = Restaurant.query.all()
-    for restaurant in restaurants:
-        generate_restaurant_insights(restaurant.id)
\ No newline at end of file
+    # Only ids are needed; insights generation commits per restaurant, which
+    # would invalidate a streaming (yield_per) cursor mid-iteration
+    restaurant_ids = db.session.scalars(db.select(Restaurant.id)).all()
+    app = current_app._get_current_object()
+    
+    def generate_in_context(restaurant_id):
+        # Each worker gets its own app context, and with it its own session
+        with app.app_context():
+            return generate_restaurant_insights(restaurant_id)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(generate_in_context, restaurant_ids))
@@ -1,52 +1,85 @@
-from app import db
+from app import db, cache
 from app.models import Restaurant
+from app.models.restaurant import DIETARY_TRENDS_CACHE_KEY
 from app.services.foursquare_service import FoursquareService
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterable
+from itertools import chain, islice
 import math
-from sqlalchemy import or_
+import numpy as np
+from sqlalchemy import func
 import inspect
 import logging
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Mean radius of the earth in kilometers
+EARTH_RADIUS_KM = 6371.0
+
+# Dietary restriction names accepted by searches, mapped to their flag columns
+DIETARY_FILTER_COLUMNS = {
+    'vegan': Restaurant.is_vegan,
+    'vegetarian': Restaurant.is_vegetarian,
+    'halal': Restaurant.is_halal,
+    'kosher': Restaurant.is_kosher,
+    'gluten_free': Restaurant.is_gluten_free
+}
+
 class RestaurantSearchService:
     """
     Enhanced restaurant search service with local DB and Foursquare integration
     """
     
     @staticmethod
-    def haversine_distance(
-        lat1: float, 
-        lon1: float, 
-        lat2: float, 
-        lon2: float
-    ) -> float:
+    def haversine_distances(
+        latitude: float, 
+        longitude: float, 
+        latitudes: np.ndarray, 
+        longitudes: np.ndarray
+    ) -> np.ndarray:
         """
-        Calculate the great circle distance between two points 
-        on the earth (specified in decimal degrees)
+        Vectorized haversine distance from one point to arrays of points
         
-        :return: Distance in kilometers
+        :param latitude: Origin latitude
+        :param longitude: Origin longitude
+        :param latitudes: Array of destination latitudes
+        :param longitudes: Array of destination longitudes
+        :return: Array of distances in kilometers
         """
-        # Radius of earth in kilometers
-        R = 6371.0
-        
-        # Convert latitude and longitude to radians
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
+        lat1_rad = math.radians(latitude)
+        lat2_rad = np.radians(latitudes)
         
-        # Haversine formula
-        dlon = lon2_rad - lon1_rad
         dlat = lat2_rad - lat1_rad
+        dlon = np.radians(longitudes) - math.radians(longitude)
         
-        a = (math.sin(dlat/2)**2 + 
-             math.cos(lat1_rad) * math.cos(lat2_rad) * 
-             math.sin(dlon/2)**2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+        a = (np.sin(dlat / 2) ** 2 + 
+             math.cos(lat1_rad) * np.cos(lat2_rad) * 
+             np.sin(dlon / 2) ** 2)
         
-        return R * c
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    
+    @staticmethod
+    def bounding_box(latitude: float, longitude: float, max_distance: float) -> List[Any]:
+        """
+        SQL predicates for the latitude/longitude box enclosing a search radius
+        
+        :param latitude: Search center latitude
+        :param longitude: Search center longitude
+        :param max_distance: Search radius in kilometers
+        :return: List of filter expressions
+        """
+        # A degree of latitude is ~111 km; longitude degrees shrink with cos(latitude)
+        dlat = max_distance / 111.0
+        predicates = [Restaurant.latitude.between(latitude - dlat, latitude + dlat)]
+        
+        # Near the poles or across the antimeridian the longitude range is
+        # unbounded or wraps, so only the latitude band applies
+        cos_lat = math.cos(math.radians(latitude))
+        if cos_lat > 1e-6:
+            dlon = max_distance / (111.0 * cos_lat)
+            if -180 <= longitude - dlon and longitude + dlon <= 180:
+                predicates.append(Restaurant.longitude.between(longitude - dlon, longitude + dlon))
+        
+        return predicates
     
     @classmethod
     def search_restaurants(
@@ -57,8 +90,10 @@ class RestaurantSearchService:
         min_rating: Optional[float] = None, 
         max_price: Optional[int] = None,
         query: Optional[str] = None,
-        max_distance: Optional[float] = None
-    ) -> List[Restaurant]:
+        max_distance: Optional[float] = None,
+        category: Optional[str] = None,
+        max_results: Optional[int] = 50
+    ) -> Iterable[Any]:
         """
         Comprehensive restaurant search with Foursquare integration
         
@@ -69,7 +104,12 @@ class RestaurantSearchService:
         :param max_price: Maximum price range
         :param query: Text search query
         :param max_distance: Maximum distance from search center
-        :return: List of matching restaurants
+        :param category: Category name the restaurant must be listed under
+        :param max_results: Maximum number of restaurants returned (None for all)
+        :return: Matching restaurants sorted by rating, as summary rows
+                 (see Restaurant.summary_columns). When local results suffice
+                 this is a lazy iterator streaming rows from the database
+                 in batches
         """
         # Initialize empty list for results
         results = []
@@ -78,28 +118,23 @@ class RestaurantSearchService:
             # Start with local database search
             search_query = Restaurant.query
             
-            # Text query filtering
+            # Text query filtering through the full-text GIN index
             if query:
                 search_query = search_query.filter(
-                    or_(
-                        Restaurant.name.ilike(f'%{query}%'),
-                        Restaurant.description.ilike(f'%{query}%')
-                    )
+                    Restaurant.search_vector.op('@@')(func.plainto_tsquery('english', query))
                 )
             
-            # Dietary restriction filtering
+            # Category filtering (served by the GIN index on categories)
+            if category:
+                search_query = search_query.filter(Restaurant.categories.contains([category]))
+            
+            # Dietary restriction filtering; IS TRUE matches the partial index predicates
             if dietary_restrictions:
-                for restriction in dietary_restrictions:
-                    if restriction == 'vegan':
-                        search_query = search_query.filter(Restaurant.is_vegan == True)
-                    elif restriction == 'vegetarian':
-                        search_query = search_query.filter(Restaurant.is_vegetarian == True)
-                    elif restriction == 'halal':
-                        search_query = search_query.filter(Restaurant.is_halal == True)
-                    elif restriction == 'kosher':
-                        search_query = search_query.filter(Restaurant.is_kosher == True)
-                    elif restriction == 'gluten_free':
-                        search_query = search_query.filter(Restaurant.is_gluten_free == True)
+                search_query = search_query.filter(*(
+                    DIETARY_FILTER_COLUMNS[restriction].is_(True)
+                    for restriction in dict.fromkeys(dietary_restrictions)
+                    if restriction in DIETARY_FILTER_COLUMNS
+                ))
             
             # Rating filtering
             if min_rating is not None:
@@ -109,119 +144,85 @@ class RestaurantSearchService:
             if max_price is not None:
                 search_query = search_query.filter(Restaurant.price <= max_price)
             
-            # Execute local database search
-            local_restaurants = search_query.all()
-            
-            # Filter by distance if coordinates provided
+            # Distance filtering with the earthdistance extension: the earth_box
+            # containment test uses the GiST index, earth_distance refines it
+            # to the exact radius
             if latitude is not None and longitude is not None and max_distance is not None:
-                local_restaurants = [
-                    restaurant for restaurant in local_restaurants
-                    if restaurant.latitude is not None and restaurant.longitude is not None and
-                    cls.haversine_distance(
-                        latitude, longitude, 
-                        restaurant.latitude, restaurant.longitude
-                    ) <= max_distance
-                ]
-            
-            # If not enough local results, fetch from Foursquare
-            if not local_restaurants or len(local_restaurants) < 5:
-                logger.info("Not enough local results, fetching from Foursquare API")
-                
-                # Prepare Foursquare search parameters
-                foursquare_params = {
-                    'latitude': latitude,
-                    'longitude': longitude,
-                    'query': query,
-                    'limit': 50  # Fetch more results to supplement local data
-                }
-                
-                # Remove None values
-                foursquare_params = {k: v for k, v in foursquare_params.items() if v is not None}
-                
-                # Fetch restaurants from Foursquare
-                foursquare_restaurants = FoursquareService.get_restaurants_near(**foursquare_params)
-                
-                logger.info(f"Retrieved {len(foursquare_restaurants)} restaurants from Foursquare API")
-                
-                # Add new restaurants to database
-                new_restaurants = []
-                for restaurant_data in foursquare_restaurants:
-                    try:
-                        # Validate required fields
-                        if not restaurant_data.get('foursquare_id') or not restaurant_data.get('name'):
-                            logger.warning(f"Skipping restaurant with missing required fields")
-                            continue
-                        
-                        # Check if restaurant already exists
-                        existing = Restaurant.query.filter_by(foursquare_id=restaurant_data['foursquare_id']).first()
-                        
-                        if existing:
-                            logger.info(f"Restaurant already exists: {existing.name}")
-                            if existing not in local_restaurants:
-                                local_restaurants.append(existing)
-                        else:
-                            # Create a new restaurant
-                            new_restaurant = Restaurant(
-                                foursquare_id=restaurant_data['foursquare_id'],
-                                name=restaurant_data['name'],
-                                address=restaurant_data.get('address'),
-                                latitude=restaurant_data.get('latitude'),
-                                longitude=restaurant_data.get('longitude'),
-                                categories=restaurant_data.get('categories', ''),
-                                rating=restaurant_data.get('rating', 4.0),  # Default rating
-                                price=restaurant_data.get('price', 2),  # Default to mid-price
-                                is_vegan=restaurant_data.get('is_vegan', False),
-                                is_vegetarian=restaurant_data.get('is_vegetarian', False),
-                                is_halal=restaurant_data.get('is_halal', False),
-                                is_kosher=restaurant_data.get('is_kosher', False),
-                                is_gluten_free=restaurant_data.get('is_gluten_free', False),
-                                raw_api_data=restaurant_data.get('raw_api_data'),
-                                updated_at=datetime.utcnow()
-                            )
-                            
-                            db.session.add(new_restaurant)
-                            new_restaurants.append(new_restaurant)
-                            logger.info(f"Created new restaurant: {new_restaurant.name}")
-                    except Exception as e:
-                        db.session.rollback()
-                        logger.error(f"Error creating restaurant: {e}")
-                        continue
+                center = func.ll_to_earth(latitude, longitude)
+                radius_m = max_distance * 1000
+                search_query = search_query.filter(
+                    func.earth_box(center, radius_m).op('@>')(Restaurant.earth_point()),
+                    func.earth_distance(center, Restaurant.earth_point()) <= radius_m
+                )
                 
-                # Commit new restaurants
-                try:
+                # Equivalent latitude/longitude bounding box, which lets the
+                # planner use the (partial) lat/lon btree indexes as well
+                search_query = search_query.filter(*cls.bounding_box(latitude, longitude, max_distance))
+            
+            # Execute local database search, selecting only summary columns
+            # sorted by rating (top max_results only), and stream the rows in
+            # batches of 200
+            local_query = (
+                search_query
+                .with_entities(*Restaurant.summary_columns())
+                .order_by(Restaurant.rating.desc().nulls_last())
+            )
+            if max_results is not None:
+                local_query = local_query.limit(max_results)
+            local_rows = iter(local_query.yield_per(200))
+            local_restaurants = list(islice(local_rows, 5))
+            
+            # Enough local results: the database already applied every filter
+            # and the ordering, so hand the stream over as is
+            if len(local_restaurants) == 5 or len(local_restaurants) == max_results:
+                return chain(local_restaurants, local_rows)
+            
+            # Not enough local results, fetch from Foursquare
+            logger.info("Not enough local results, fetching from Foursquare API")
+            
+            # Prepare Foursquare search parameters
+            foursquare_params = {
+                'latitude': latitude,
+                'longitude': longitude,
+                'query': query,
+                'limit': 50  # Fetch more results to supplement local data
+            }
+            
+            # Remove None values
+            foursquare_params = {k: v for k, v in foursquare_params.items() if v is not None}
+            
+            # Fetch restaurants from Foursquare
+            foursquare_restaurants = FoursquareService.get_restaurants_near(**foursquare_params)
+            
+            logger.info(f"Retrieved {len(foursquare_restaurants)} restaurants from Foursquare API")
+            
+            # Store the Foursquare restaurants; dietary flags, rating and price
+            # defaults are all set at ingest, and ones already stored are skipped
+            new_restaurants_data = {
+                restaurant_data['foursquare_id']: restaurant_data
+                for restaurant_data in foursquare_restaurants
+                if restaurant_data.get('foursquare_id') and restaurant_data.get('name')
+            }
+            try:
+                if new_restaurants_data:
+                    new_restaurants = Restaurant.insert_from_foursquare(
+                        list(new_restaurants_data.values())
+                    )
+                    db.session.commit()
+                    logger.info(f"Committed {len(new_restaurants)} new restaurants to database")
+                    
+                    # Keep the precomputed dietary trends in step with the additions
                     if new_restaurants:
+                        Restaurant.refresh_dietary_trends()
                         db.session.commit()
-                        logger.info(f"Committed {len(new_restaurants)} new restaurants to database")
-                        local_restaurants.extend(new_restaurants)
-                except Exception as e:
-                    db.session.rollback()
-                    logger.error(f"Error committing new restaurants to database: {e}")
-            
-            # Final filtering and sorting
-            filtered_restaurants = []
-            for restaurant in local_restaurants:
-                try:
-                    # Basic validation
-                    if restaurant.rating is None and min_rating is not None:
-                        continue
-                    if restaurant.price is None and max_price is not None:
-                        continue
-                    
-                    # Additional filtering
-                    if min_rating is not None and restaurant.rating < min_rating:
-                        continue
-                    if max_price is not None and restaurant.price > max_price:
-                        continue
-                        
-                    filtered_restaurants.append(restaurant)
-                except Exception as e:
-                    logger.error(f"Error filtering restaurant {restaurant.id}: {e}")
-                    continue
-            
-            # Sort by rating
-            filtered_restaurants.sort(key=lambda x: x.rating if x.rating is not None else 0, reverse=True)
-            
-            results = filtered_restaurants
+                        cache.delete(DIETARY_TRENDS_CACHE_KEY)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error committing new restaurants to database: {e}")
+            
+            # Re-run the local query, so Foursquare additions go through the
+            # same indexed filters, ordering and limit as local rows
+            results = local_query.all()
             
         except Exception as e:
             logger.error(f"Error in restaurant search: {e}")
@@ -0,0 +1,64 @@
+"""Initial schema
+
+Revision ID: 4e176b892f49
+Revises: 
+Create Date: 2026-10-14 06:44:44.632290
+
+Schema of the original models. A database created before migrations were
+added is adopted with `flask db stamp 4e176b892f49` (then `flask db upgrade`);
+one created by db.create_all() from the current models with `flask db stamp head`.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e176b892f49'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'restaurants',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('foursquare_id', sa.String(length=100), nullable=False),
+        sa.Column('name', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('address', sa.String(length=300), nullable=True),
+        sa.Column('latitude', sa.Float(), nullable=True),
+        sa.Column('longitude', sa.Float(), nullable=True),
+        sa.Column('categories', sa.String(length=500), nullable=True),
+        sa.Column('rating', sa.Float(), nullable=True),
+        sa.Column('price', sa.Integer(), nullable=True),
+        sa.Column('raw_api_data', sa.Text(), nullable=True),
+        sa.Column('is_vegan', sa.Boolean(), nullable=True),
+        sa.Column('is_vegetarian', sa.Boolean(), nullable=True),
+        sa.Column('is_halal', sa.Boolean(), nullable=True),
+        sa.Column('is_kosher', sa.Boolean(), nullable=True),
+        sa.Column('is_gluten_free', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_restaurants_foursquare_id', 'restaurants', ['foursquare_id'], unique=True)
+    op.create_table(
+        'reviews',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('restaurant_id', sa.Integer(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=True),
+        sa.Column('rating', sa.Float(), nullable=True),
+        sa.Column('sentiment', sa.String(length=20), nullable=True),
+        sa.Column('dietary_keywords', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['restaurant_id'], ['restaurants.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('reviews')
+    op.drop_index('ix_restaurants_foursquare_id', table_name='restaurants')
+    op.drop_table('restaurants')
@@ -0,0 +1,38 @@
+"""Store categories as a text array
+
+Revision ID: 5846d3a4e066
+Revises: eca7492dbef3
+Create Date: 2026-10-14 06:44:53.555167
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5846d3a4e066'
+down_revision = 'eca7492dbef3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Categories were stored joined with ', '
+    op.alter_column(
+        'restaurants', 'categories',
+        type_=postgresql.ARRAY(sa.String(length=100)),
+        existing_type=sa.String(length=500),
+        postgresql_using="string_to_array(NULLIF(categories, ''), ', ')::varchar(100)[]"
+    )
+    op.create_index('ix_restaurants_categories', 'restaurants', ['categories'], postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_restaurants_categories', table_name='restaurants')
+    op.alter_column(
+        'restaurants', 'categories',
+        type_=sa.String(length=500),
+        existing_type=postgresql.ARRAY(sa.String(length=100)),
+        postgresql_using="array_to_string(categories, ', ')"
+    )
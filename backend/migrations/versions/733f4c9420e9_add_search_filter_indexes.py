@@ -0,0 +1,36 @@
+"""Add search filter indexes
+
+Revision ID: 733f4c9420e9
+Revises: 4e176b892f49
+Create Date: 2026-10-14 06:44:47.526377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '733f4c9420e9'
+down_revision = '4e176b892f49'
+branch_labels = None
+depends_on = None
+
+# Dietary flags whose restaurants get partial indexes
+DIETARY_FLAGS = ('vegan', 'vegetarian', 'halal', 'kosher', 'gluten_free')
+
+
+def upgrade():
+    op.create_index('ix_restaurants_geo', 'restaurants', ['latitude', 'longitude'])
+    op.create_index('ix_restaurants_rating', 'restaurants', ['rating'])
+    for flag in DIETARY_FLAGS:
+        op.create_index(
+            f'ix_restaurants_{flag}_geo', 'restaurants', ['latitude', 'longitude'],
+            postgresql_where=sa.text(f'is_{flag} IS true')
+        )
+
+
+def downgrade():
+    for flag in DIETARY_FLAGS:
+        op.drop_index(f'ix_restaurants_{flag}_geo', table_name='restaurants')
+    op.drop_index('ix_restaurants_rating', table_name='restaurants')
+    op.drop_index('ix_restaurants_geo', table_name='restaurants')
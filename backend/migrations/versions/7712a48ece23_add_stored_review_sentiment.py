@@ -0,0 +1,28 @@
+"""Add stored review sentiment
+
+Revision ID: 7712a48ece23
+Revises: b67a25eee5e5
+Create Date: 2026-10-14 06:45:16.070002
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7712a48ece23'
+down_revision = 'b67a25eee5e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing reviews are left NULL here, since scoring needs the VADER
+    # lexicon; run `python run.py backfill-sentiment` after upgrading
+    op.add_column('reviews', sa.Column('sentiment_polarity', sa.Float(), nullable=True))
+    op.add_column('reviews', sa.Column('sentiment_analyzed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    op.drop_column('reviews', 'sentiment_analyzed_at')
+    op.drop_column('reviews', 'sentiment_polarity')
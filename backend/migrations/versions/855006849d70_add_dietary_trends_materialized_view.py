@@ -0,0 +1,39 @@
+"""Add dietary trends materialized view
+
+Revision ID: 855006849d70
+Revises: bfb618d8eb7f
+Create Date: 2026-10-14 06:45:04.883178
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '855006849d70'
+down_revision = 'bfb618d8eb7f'
+branch_labels = None
+depends_on = None
+
+# Must match DIETARY_TRENDS_VIEW in app/models/restaurant.py
+DIETARY_TRENDS_VIEW = 'dietary_trends_mv'
+
+
+def upgrade():
+    op.execute(f'''
+        CREATE MATERIALIZED VIEW {DIETARY_TRENDS_VIEW} AS
+        SELECT 1 AS id,
+               count(*) AS total,
+               count(*) FILTER (WHERE is_vegan) AS vegan,
+               count(*) FILTER (WHERE is_vegetarian) AS vegetarian,
+               count(*) FILTER (WHERE is_halal) AS halal,
+               count(*) FILTER (WHERE is_kosher) AS kosher,
+               count(*) FILTER (WHERE is_gluten_free) AS gluten_free
+        FROM restaurants
+    ''')
+    # REFRESH ... CONCURRENTLY requires a unique index on the view
+    op.execute(f'CREATE UNIQUE INDEX ix_{DIETARY_TRENDS_VIEW}_id ON {DIETARY_TRENDS_VIEW} (id)')
+
+
+def downgrade():
+    op.execute(f'DROP MATERIALIZED VIEW IF EXISTS {DIETARY_TRENDS_VIEW}')
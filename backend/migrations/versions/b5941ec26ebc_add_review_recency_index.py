@@ -0,0 +1,27 @@
+"""Add review recency index
+
+Revision ID: b5941ec26ebc
+Revises: cf7fc333c2a2
+Create Date: 2026-10-14 06:44:59.329595
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5941ec26ebc'
+down_revision = 'cf7fc333c2a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_reviews_restaurant_created', 'reviews',
+        ['restaurant_id', sa.text('created_at DESC')]
+    )
+
+
+def downgrade():
+    op.drop_index('ix_reviews_restaurant_created', table_name='reviews')
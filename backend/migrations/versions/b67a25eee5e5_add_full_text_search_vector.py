@@ -0,0 +1,36 @@
+"""Add full-text search vector
+
+Revision ID: b67a25eee5e5
+Revises: f21f104ecb51
+Create Date: 2026-10-14 06:45:13.242755
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b67a25eee5e5'
+down_revision = 'f21f104ecb51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Generated column, filled for existing rows when it is added
+    op.add_column('restaurants', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, ''))",
+            persisted=True
+        ),
+        nullable=True
+    ))
+    op.create_index('ix_restaurants_search', 'restaurants', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_restaurants_search', table_name='restaurants')
+    op.drop_column('restaurants', 'search_vector')
@@ -0,0 +1,32 @@
+"""Add earthdistance index
+
+Revision ID: bfb618d8eb7f
+Revises: b5941ec26ebc
+Create Date: 2026-10-14 06:45:01.953201
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bfb618d8eb7f'
+down_revision = 'b5941ec26ebc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # earthdistance depends on cube
+    op.execute('CREATE EXTENSION IF NOT EXISTS cube')
+    op.execute('CREATE EXTENSION IF NOT EXISTS earthdistance')
+    op.create_index(
+        'ix_restaurants_earth', 'restaurants',
+        [sa.text('ll_to_earth(latitude, longitude)')],
+        postgresql_using='gist'
+    )
+
+
+def downgrade():
+    # The extensions are left installed, other objects may depend on them
+    op.drop_index('ix_restaurants_earth', table_name='restaurants')
@@ -0,0 +1,25 @@
+"""Add restaurants.cached_json
+
+Revision ID: cf7fc333c2a2
+Revises: 5846d3a4e066
+Create Date: 2026-10-14 06:44:56.224381
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cf7fc333c2a2'
+down_revision = '5846d3a4e066'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows are serialized on demand until their next write
+    op.add_column('restaurants', sa.Column('cached_json', sa.Text(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('restaurants', 'cached_json')
@@ -0,0 +1,38 @@
+"""Add rating-ordered search indexes
+
+Revision ID: eaf6ac348c42
+Revises: 855006849d70
+Create Date: 2026-10-14 06:45:07.437063
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'eaf6ac348c42'
+down_revision = '855006849d70'
+branch_labels = None
+depends_on = None
+
+# Dietary flags whose restaurants get partial indexes
+DIETARY_FLAGS = ('vegan', 'vegetarian', 'halal', 'kosher', 'gluten_free')
+
+
+def upgrade():
+    for flag in DIETARY_FLAGS:
+        op.create_index(
+            f'ix_restaurants_{flag}_rating', 'restaurants',
+            [sa.text('rating DESC NULLS LAST')],
+            postgresql_where=sa.text(f'is_{flag} IS true')
+        )
+    op.create_index(
+        'ix_restaurants_price_rating', 'restaurants',
+        ['price', sa.text('rating DESC NULLS LAST')]
+    )
+
+
+def downgrade():
+    op.drop_index('ix_restaurants_price_rating', table_name='restaurants')
+    for flag in DIETARY_FLAGS:
+        op.drop_index(f'ix_restaurants_{flag}_rating', table_name='restaurants')
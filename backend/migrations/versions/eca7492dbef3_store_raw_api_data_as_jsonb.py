@@ -0,0 +1,36 @@
+"""Store raw_api_data as JSONB
+
+Revision ID: eca7492dbef3
+Revises: 733f4c9420e9
+Create Date: 2026-10-14 06:44:50.466306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'eca7492dbef3'
+down_revision = '733f4c9420e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rows hold the JSON text the API record was dumped to
+    op.alter_column(
+        'restaurants', 'raw_api_data',
+        type_=postgresql.JSONB(),
+        existing_type=sa.Text(),
+        postgresql_using='raw_api_data::jsonb'
+    )
+
+
+def downgrade():
+    op.alter_column(
+        'restaurants', 'raw_api_data',
+        type_=sa.Text(),
+        existing_type=postgresql.JSONB(),
+        postgresql_using='raw_api_data::text'
+    )
@@ -0,0 +1,26 @@
+"""Order the rating index best first
+
+Revision ID: f21f104ecb51
+Revises: eaf6ac348c42
+Create Date: 2026-10-14 06:45:10.390447
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f21f104ecb51'
+down_revision = 'eaf6ac348c42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_index('ix_restaurants_rating', table_name='restaurants')
+    op.create_index('ix_restaurants_rating', 'restaurants', [sa.text('rating DESC NULLS LAST')])
+
+
+def downgrade():
+    op.drop_index('ix_restaurants_rating', table_name='restaurants')
+    op.create_index('ix_restaurants_rating', 'restaurants', ['rating'])
@@ -1,9 +1,10 @@
 import os
 import sys
 import logging
-from flask.cli import FlaskGroup
-from app import create_app, db
-from config.config import get_config, validate_config
+import copy
+import functools
+import click
+from flask.cli import FlaskGroup, ScriptInfo, run_command
 
 def setup_logging():
     """
@@ -14,32 +15,72 @@ def setup_logging():
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
             logging.StreamHandler(sys.stdout),
-            logging.FileHandler('food_findr.log')
+            # delay: the log file is only opened once something is logged
+            logging.FileHandler('food_findr.log', delay=True)
         ]
     )
     logger = logging.getLogger(__name__)
     return logger
 
+def check_api_config(config):
+    """
+    Minimal runtime guard for the commands that serve or call the Foursquare
+    API; the configurations themselves are checked by tools/validate_config.py
+    in the pre-commit hook
+    
+    :param config: Application config
+    """
+    if not config['FOURSQUARE_CLIENT_ID'] or not config['FOURSQUARE_CLIENT_SECRET']:
+        sys.exit("Configuration validation failed: missing Foursquare API credentials")
+    if config.get('CONFIG_NAME') == 'production' and config['SECRET_KEY'] == 'development_secret_key':
+        sys.exit("Configuration validation failed: using default secret key is not secure")
+
+class LazyFlaskGroup(FlaskGroup):
+    """
+    FlaskGroup that lists only the commands registered on the group itself
+    
+    FlaskGroup.list_commands() loads the app to add the commands of app.cli,
+    which made `--help` import and create the whole application. Commands
+    registered on app.cli are still found by name, loading the app only
+    when one of them is invoked.
+    """
+    
+    def list_commands(self, ctx):
+        self._load_plugin_commands()
+        return sorted(click.Group.list_commands(self, ctx))
+
 def create_cli_app():
     """
     Create a Flask CLI application with additional commands
+    
+    The application (and with it Flask-SQLAlchemy and the app package) is
+    only imported and created once a command needs it, so `--help` stays fast
     """
-    # Get appropriate configuration
-    config_class = get_config()
-    
-    # Validate configuration
-    config_errors = validate_config(config_class)
-    if config_errors:
-        print("Configuration validation failed:")
-        for error in config_errors:
-            print(f"- {error}")
-        sys.exit(1)
+    def load_app():
+        from app import create_app
+        
+        # Logging is only configured once a command needs the app
+        setup_logging()
+        
+        # Create application with the configuration selected by FLASK_ENV
+        return create_app()
+    
+    # Create a FlaskGroup for additional CLI commands; each command runs
+    # inside the application context, loading the app when it is invoked
+    cli = LazyFlaskGroup(create_app=load_app)
+    
+    # Flask's development server, guarded like the Foursquare commands
+    serve = run_command.callback
     
-    # Create application
-    app = create_app(config_class)
+    @functools.wraps(serve)
+    def guarded_run(*args, **kwargs):
+        info = click.get_current_context().ensure_object(ScriptInfo)
+        check_api_config(info.load_app().config)
+        return serve(*args, **kwargs)
     
-    # Create a FlaskGroup for additional CLI commands
-    cli = FlaskGroup(create_app=lambda: app)
+    guarded_run_command = copy.copy(run_command)
+    guarded_run_command.callback = guarded_run
+    cli.add_command(guarded_run_command)
     
     @cli.command("test")
     def run_tests():
@@ -61,33 +102,66 @@ def create_cli_app():
         """
         Manually trigger restaurant data synchronization
         """
+        from flask import current_app
         from app.services.data_sync_service import PeriodicSyncManager
         
+        check_api_config(current_app.config)
+        
         print("Starting restaurant data synchronization...")
         sync_log = PeriodicSyncManager.perform_periodic_sync()
         print(f"Sync completed. Details: {sync_log}")
     
+    @cli.command("download-nlp-data")
+    def download_nlp_data():
+        """
+        Download the NLTK VADER lexicon used for review sentiment into NLTK_DATA_PATH
+        """
+        import nltk
+        from flask import current_app
+        
+        nltk_data_path = current_app.config['NLTK_DATA_PATH']
+        print(f"Downloading VADER lexicon to {nltk_data_path}...")
+        if not nltk.download('vader_lexicon', download_dir=nltk_data_path):
+            sys.exit("VADER lexicon download failed.")
+        print("VADER lexicon downloaded successfully.")
+    
+    @cli.command("backfill-sentiment")
+    def backfill_sentiment():
+        """
+        Score the stored sentiment of reviews that have none yet
+        """
+        from app.services.nlp_service import SentimentAnalyzerUnavailable, backfill_review_polarity
+        
+        print("Scoring reviews without a stored sentiment...")
+        try:
+            scored = backfill_review_polarity()
+        except SentimentAnalyzerUnavailable:
+            sys.exit("VADER lexicon is not installed, run download-nlp-data first.")
+        print(f"Sentiment backfill completed. {scored} reviews scored.")
+    
     @cli.command("create-db")
     def create_database():
         """
         Create database tables
         """
-        with app.app_context():
-            print("Creating database tables...")
-            db.create_all()
-            print("Database tables created successfully.")
+        from app import db
+        
+        print("Creating database tables...")
+        db.create_all()
+        print("Database tables created successfully.")
     
     @cli.command("drop-db")
     def drop_database():
         """
         Drop all database tables
         """
+        from app import db
+        
         confirm = input("Are you sure you want to drop all database tables? (y/N): ").lower()
         if confirm == 'y':
-            with app.app_context():
-                print("Dropping database tables...")
-                db.drop_all()
-                print("Database tables dropped successfully.")
+            print("Dropping database tables...")
+            db.drop_all()
+            print("Database tables dropped successfully.")
         else:
             print("Database drop cancelled.")
     
@@ -96,12 +170,14 @@ def create_cli_app():
         """
         Seed the database with initial data
         """
+        from flask import current_app
         from app.services.data_sync_service import PeriodicSyncManager
         
-        with app.app_context():
-            print("Seeding database with initial restaurant data...")
-            sync_log = PeriodicSyncManager.perform_periodic_sync()
-            print(f"Data seeding completed. Details: {sync_log}")
+        check_api_config(current_app.config)
+        
+        print("Seeding database with initial restaurant data...")
+        sync_log = PeriodicSyncManager.perform_periodic_sync()
+        print(f"Data seeding completed. Details: {sync_log}")
     
     return cli
 
@@ -109,8 +185,9 @@ def main():
     """
     Main application entry point
     """
-    # Setup logging
-    logger = setup_logging()
+    # Handlers are added by setup_logging() once the app is loaded; until then
+    # errors go to stderr through logging's last-resort handler
+    logger = logging.getLogger(__name__)
     
     try:
         # Create CLI application
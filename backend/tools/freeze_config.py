@@ -0,0 +1,38 @@
+"""
+Freeze the selected configuration into config/_frozen.py
+
+Run at deployment, after .env is in place. The generated module holds the
+settings of get_config() as a literal dict, so the app can load them with
+a plain import instead of parsing .env and rebuilding the configuration
+dicts on every start. Delete config/_frozen.py (or re-run this script)
+whenever the environment changes.
+"""
+import os
+import pprint
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from config.config import get_config
+
+FROZEN_CONFIG_PATH = os.path.join(BACKEND_DIR, 'config', '_frozen.py')
+
+def freeze_config(path=FROZEN_CONFIG_PATH):
+    """
+    Write the selected configuration as a module holding a literal dict
+    
+    :param path: Destination of the generated module
+    :return: Selected configuration
+    """
+    config = get_config()
+    
+    with open(path, 'w') as frozen_file:
+        frozen_file.write('"""Generated by tools/freeze_config.py; do not edit"""\n\n')
+        frozen_file.write(f'CONFIG = {pprint.pformat(config, sort_dicts=False)}\n')
+    
+    return config
+
+if __name__ == '__main__':
+    config = freeze_config()
+    print(f"Froze the {config['CONFIG_NAME']} configuration into {FROZEN_CONFIG_PATH}")
@@ -0,0 +1,77 @@
+"""
+Structural checks for the configurations in config/config.py
+
+Run by the pre-commit hook whenever config/config.py changes, so the app
+does not have to re-validate its configurations on every startup.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import BASE_CONFIG, PRODUCTION_CONFIG, CONFIG_SELECTOR
+
+# Settings every configuration must define
+REQUIRED_SETTINGS = (
+    'CONFIG_NAME',
+    'SECRET_KEY',
+    'SQLALCHEMY_DATABASE_URI',
+    'FOURSQUARE_CLIENT_ID',
+    'FOURSQUARE_CLIENT_SECRET',
+    'FOURSQUARE_API_KEY',
+    'CACHE_TYPE',
+    'CACHE_DEFAULT_TIMEOUT',
+    'SYNC_INTERVAL_HOURS',
+    'NLTK_DATA_PATH'
+)
+
+# Settings production must not inherit from development or testing
+PRODUCTION_SETTINGS = {
+    'DEBUG': False,
+    'TESTING': False,
+    'SQLALCHEMY_ECHO': False,
+    'SESSION_COOKIE_SECURE': True,
+    'REMEMBER_COOKIE_SECURE': True
+}
+
+def validate_config_dicts():
+    """
+    Validate the configurations selectable through FLASK_ENV
+    
+    :return: List of error messages
+    """
+    errors = []
+    
+    if 'production' not in CONFIG_SELECTOR:
+        errors.append("No configuration selected for FLASK_ENV=production")
+    
+    for env, config in CONFIG_SELECTOR.items():
+        missing_base = BASE_CONFIG.keys() - config.keys()
+        if missing_base:
+            errors.append(f"{env} configuration does not extend BASE_CONFIG (missing {sorted(missing_base)})")
+        
+        for setting in REQUIRED_SETTINGS:
+            if setting not in config:
+                errors.append(f"{env} configuration is missing {setting}")
+        
+        if config.get('CONFIG_NAME') != env:
+            errors.append(f"{env} configuration has CONFIG_NAME {config.get('CONFIG_NAME')!r}")
+        
+        for setting in ('CACHE_DEFAULT_TIMEOUT', 'SYNC_INTERVAL_HOURS'):
+            if not isinstance(config.get(setting), int):
+                errors.append(f"{env} configuration {setting} must be an integer")
+    
+    for setting, expected in PRODUCTION_SETTINGS.items():
+        if PRODUCTION_CONFIG.get(setting, False) != expected:
+            errors.append(f"Production {setting} must be {expected}")
+    
+    return errors
+
+def main():
+    errors = validate_config_dicts()
+    for error in errors:
+        print(f"- {error}")
+    return 1 if errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
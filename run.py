@@ -4,100 +4,284 @@ Food Findr Project Runner
 This script starts both the backend Flask server and the frontend React development server.
 """
 
+import argparse
+import selectors
 import subprocess
 import threading
 import os
 import sys
 import time
 import signal
+import socket
 import platform
 
+# Platform checks are done once, against this
+IS_WINDOWS = platform.system() == "Windows"
+
 # Track processes so we can terminate them properly
 processes = []
 
+# Relayed servers run in their own process group, so shutdown reaches the
+# processes they start in turn (the dev server behind npm, Flask's reloader)
+# with one signal per server
+if IS_WINDOWS:
+    PROCESS_GROUP_OPTIONS = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    
+    def terminate_group(process):
+        """Ask a server's process group to stop"""
+        process.send_signal(signal.CTRL_BREAK_EVENT)
+    
+    def kill_group(process):
+        """Kill a server's process group"""
+        process.kill()
+else:
+    PROCESS_GROUP_OPTIONS = {"start_new_session": True}
+    
+    def terminate_group(process):
+        """Ask a server's process group to stop"""
+        os.killpg(process.pid, signal.SIGTERM)
+    
+    def kill_group(process):
+        """Kill a server's process group"""
+        os.killpg(process.pid, signal.SIGKILL)
+
+# ANSI color codes
+COLORS = {
+    "red": "\033[91m",
+    "green": "\033[92m",
+    "yellow": "\033[93m",
+    "blue": "\033[94m",
+    "purple": "\033[95m",
+    "cyan": "\033[96m",
+    "white": "\033[97m",
+    "reset": "\033[0m"
+}
+
 def print_colored(text, color="green"):
     """Print colored text to the console"""
-    colors = {
-        "red": "\033[91m",
-        "green": "\033[92m",
-        "yellow": "\033[93m",
-        "blue": "\033[94m",
-        "purple": "\033[95m",
-        "cyan": "\033[96m",
-        "white": "\033[97m",
-        "reset": "\033[0m"
-    }
-    if platform.system() == "Windows":
+    if IS_WINDOWS:
         # Windows console may not support ANSI codes without special configuration
         print(text)
     else:
-        print(f"{colors.get(color, colors['green'])}{text}{colors['reset']}")
+        print(f"{COLORS.get(color, COLORS['green'])}{text}{COLORS['reset']}")
+
+# Address the backend listens on, and seconds to wait for it before
+# starting the frontend
+BACKEND_ADDRESS = ("127.0.0.1", 5000)
+BACKEND_START_TIMEOUT = 10
+
+# Bytes read from a child's output pipe at a time
+READ_CHUNK_SIZE = 65536
+
+# Bytes written around each line of the servers' output, built once
+# (uncolored on Windows)
+if IS_WINDOWS:
+    BACKEND_PREFIX = b"[Backend] "
+    FRONTEND_PREFIX = b"[Frontend] "
+    LINE_END = b"\n"
+else:
+    BACKEND_PREFIX = f"{COLORS['blue']}[Backend] ".encode()
+    FRONTEND_PREFIX = f"{COLORS['green']}[Frontend] ".encode()
+    LINE_END = f"{COLORS['reset']}\n".encode()
 
-def run_backend():
-    """Run the Flask backend server"""
+def run_backend(project_root, relay=True):
+    """
+    Start the Flask backend server
+    
+    :param project_root: Directory containing the backend directory
+    :param relay: Pipe the output back for relaying, rather than letting the
+                  server write straight to the terminal
+    """
     print_colored("Starting Flask backend...", "blue")
-    # Navigate to backend directory
-    os.chdir("backend")
     
     # Ensure environment is set up correctly
     flask_env = os.environ.copy()
     flask_env["FLASK_ENV"] = "development"
     
     try:
-        # Start the Flask application
+        # Start the Flask application, with unbuffered binary output. The
+        # interpreter is given by absolute path and no preexec_fn is set, so
+        # CPython can spawn it with vfork instead of a full fork
         process = subprocess.Popen(
-            ["python", "run.py"],
+            [sys.executable, "run.py"],
+            cwd=os.path.join(project_root, "backend"),
             env=flask_env,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1
+            stdout=subprocess.PIPE if relay else None,
+            stderr=subprocess.STDOUT if relay else None,
+            bufsize=0,
+            # Without relaying (exec mode) the backend stays in the
+            # terminal's group, where Ctrl+C reaches it directly
+            **(PROCESS_GROUP_OPTIONS if relay else {})
         )
         processes.append(process)
-        
-        # Print server output with prefix for identification
-        for line in process.stdout:
-            print_colored(f"[Backend] {line.strip()}", "blue")
+        return process
             
     except Exception as e:
         print_colored(f"Error starting Flask backend: {str(e)}", "red")
         clean_up()
         sys.exit(1)
 
-def run_frontend():
-    """Run the React frontend development server"""
+def wait_for_backend(process, timeout=BACKEND_START_TIMEOUT):
+    """
+    Poll the backend's port until it accepts connections
+    
+    :param process: Backend process; polling stops early if it exits
+    :param timeout: Seconds to wait at most
+    :return: Whether the backend is accepting connections
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and process.poll() is None:
+        try:
+            with socket.create_connection(BACKEND_ADDRESS, timeout=0.1):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+def run_frontend(project_root):
+    """
+    Start the React frontend development server
+    
+    :param project_root: Directory containing the frontend directory
+    """
     print_colored("Starting React frontend...", "green")
-    # Navigate to frontend directory from project root
-    os.chdir("frontend")
     
     try:
-        # Start the React development server
+        # Start the React development server, with unbuffered binary output
         process = subprocess.Popen(
             ["npm", "run", "dev"],
+            cwd=os.path.join(project_root, "frontend"),
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1
+            bufsize=0,
+            **PROCESS_GROUP_OPTIONS
         )
         processes.append(process)
-        
-        # Print server output with prefix for identification
-        for line in process.stdout:
-            print_colored(f"[Frontend] {line.strip()}", "green")
+        return process
             
     except Exception as e:
         print_colored(f"Error starting React frontend: {str(e)}", "red")
         clean_up()
         sys.exit(1)
 
+def copy_output(pipe, prefix, partial):
+    """
+    Copy the complete lines in one chunk of a child's output to stdout,
+    each prefixed for identification
+    
+    :param partial: Buffer holding the child's unfinished last line
+    :return: False once the child closed its output
+    """
+    chunk = os.read(pipe.fileno(), READ_CHUNK_SIZE)
+    if not chunk:
+        if partial:
+            sys.stdout.buffer.write(prefix + partial + LINE_END)
+            sys.stdout.buffer.flush()
+        return False
+    
+    partial += chunk
+    end = partial.rfind(b"\n")
+    if end >= 0:
+        # Format every complete line of the chunk at once
+        lines = bytes(partial[:end]).replace(b"\n", LINE_END + prefix)
+        del partial[:end + 1]
+        sys.stdout.buffer.write(prefix + lines + LINE_END)
+        sys.stdout.buffer.flush()
+    return True
+
+def copy_all_output(pipe, prefix):
+    """Copy a child's output to stdout until it closes it"""
+    partial = bytearray()
+    while copy_output(pipe, prefix, partial):
+        pass
+
+def relay_output(outputs):
+    """
+    Relay the output of the child processes to stdout in chunks until they
+    all close it, or a termination signal arrives
+    
+    :param outputs: Mapping of child stdout pipes to their output prefix
+    """
+    # Output is written to the binary buffer from here on, so flush any text
+    # printed so far to keep it in order
+    sys.stdout.flush()
+    
+    if IS_WINDOWS:
+        # Windows pipes cannot be watched by a selector, so each gets a thread
+        threads = [
+            threading.Thread(target=copy_all_output, args=(pipe, prefix), daemon=True)
+            for pipe, prefix in outputs.items()
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return
+    
+    # Termination signals are delivered through a wakeup socket watched by the
+    # same selector, so they stop the loop between writes rather than
+    # interrupting one
+    wakeup_read, wakeup_write = socket.socketpair()
+    wakeup_read.setblocking(False)
+    wakeup_write.setblocking(False)
+    previous_wakeup_fd = signal.set_wakeup_fd(wakeup_write.fileno())
+    previous_handlers = {
+        sig: signal.signal(sig, lambda sig, frame: None)
+        for sig in (signal.SIGINT, signal.SIGTERM)
+    }
+    
+    try:
+        with selectors.DefaultSelector() as selector:
+            selector.register(wakeup_read, selectors.EVENT_READ)
+            for pipe, prefix in outputs.items():
+                selector.register(pipe, selectors.EVENT_READ, (prefix, bytearray()))
+            
+            # Run until every child closed its output (only the wakeup socket left)
+            while len(selector.get_map()) > 1:
+                for key, _ in selector.select():
+                    if key.fileobj is wakeup_read:
+                        print_colored("\nReceived termination signal.", "yellow")
+                        return
+                    prefix, partial = key.data
+                    if not copy_output(key.fileobj, prefix, partial):
+                        selector.unregister(key.fileobj)
+    finally:
+        signal.set_wakeup_fd(previous_wakeup_fd)
+        for sig, handler in previous_handlers.items():
+            signal.signal(sig, handler)
+        wakeup_read.close()
+        wakeup_write.close()
+
+def exec_frontend(project_root):
+    """
+    Replace this process with the React frontend development server
+    
+    The backend, started with relay=False, stays in the terminal's foreground
+    process group, so Ctrl+C and hangups reach it and npm alike.
+    
+    :param project_root: Directory containing the frontend directory
+    """
+    print_colored("Starting React frontend...", "green")
+    # The exec'd npm inherits this process's working directory
+    os.chdir(os.path.join(project_root, "frontend"))
+    
+    sys.stdout.flush()
+    try:
+        os.execvp("npm", ["npm", "run", "dev"])
+    except OSError as e:
+        print_colored(f"Error starting React frontend: {str(e)}", "red")
+        clean_up()
+        sys.exit(1)
+
 def clean_up():
     """Terminate all running processes"""
     print_colored("\nShutting down servers...", "yellow")
     for process in processes:
         if process.poll() is None:  # Process is still running
-            if platform.system() == "Windows":
-                process.send_signal(signal.CTRL_C_EVENT)
-            else:
+            try:
+                terminate_group(process)
+            except ProcessLookupError:
+                # Not a group leader (exec mode backend)
                 process.terminate()
     
     # Give processes a moment to terminate gracefully
@@ -107,7 +291,10 @@ def clean_up():
     for process in processes:
         if process.poll() is None:
             print_colored(f"Force killing process {process.pid}", "red")
-            process.kill()
+            try:
+                kill_group(process)
+            except ProcessLookupError:
+                process.kill()
 
 def signal_handler(sig, frame):
     """Handle termination signals"""
@@ -115,8 +302,13 @@ def signal_handler(sig, frame):
     clean_up()
     sys.exit(0)
 
-def main():
-    """Main function to run the application"""
+def main(exec_mode=False):
+    """
+    Main function to run the application
+    
+    :param exec_mode: Run the frontend in place of this process instead of
+                      relaying both servers' output (POSIX only)
+    """
     # Register signal handlers for graceful shutdown
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
@@ -134,19 +326,25 @@ def main():
             print_colored("Error: frontend directory not found!", "red")
             return
         
-        # Start backend in a separate thread
-        backend_thread = threading.Thread(target=run_backend)
-        backend_thread.daemon = True
-        backend_thread.start()
+        # Start backend
+        backend_process = run_backend(project_root, relay=not exec_mode)
         
-        # Give backend a moment to start before frontend
-        time.sleep(2)
+        # Wait for the backend to accept connections before starting frontend
+        if not wait_for_backend(backend_process):
+            print_colored("Backend is not accepting connections yet; starting frontend anyway", "yellow")
         
-        # Return to project root
-        os.chdir(project_root)
+        # Hand this process over to npm; only returns if it cannot be started
+        if exec_mode:
+            exec_frontend(project_root)
         
-        # Start frontend (this will block in the main thread)
-        run_frontend()
+        # Start frontend
+        frontend_process = run_frontend(project_root)
+        
+        # Relay both servers' output until they exit (this blocks the main thread)
+        relay_output({
+            backend_process.stdout: BACKEND_PREFIX,
+            frontend_process.stdout: FRONTEND_PREFIX
+        })
         
     except KeyboardInterrupt:
         print_colored("\nProcess interrupted by user.", "yellow")
@@ -154,6 +352,17 @@ def main():
         clean_up()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Food Findr backend and frontend servers")
+    parser.add_argument(
+        "--exec-frontend",
+        action="store_true",
+        help="replace the runner with the frontend server instead of prefixing "
+             "and relaying output (POSIX only; saves one Python process)"
+    )
+    args = parser.parse_args()
+    if args.exec_frontend and IS_WINDOWS:
+        parser.error("--exec-frontend is not supported on Windows")
+    
     print_colored("===== Food Findr Application Runner =====", "purple")
     print_colored("Press Ctrl+C to stop all servers", "yellow")
-    main()
\ No newline at end of file
+    main(exec_mode=args.exec_frontend)
\ No newline at end of file